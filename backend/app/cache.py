@@ -0,0 +1,93 @@
+# backend/app/cache.py
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+
+def result_key(pdf_hash: str, pages: Sequence[int], language: str, model_version: str,
+               output_mode: str = "raster") -> str:
+    """Clé d'un PDF traduit: hash du source, pages, langue cible, version du modèle et mode de sortie."""
+    raw = "|".join([pdf_hash, ",".join(map(str, pages)), language, model_version, output_mode])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Cache sur disque des PDF traduits, adressé par contenu.
+
+    Chaque entrée est un fichier `<root>/<key[:2]>/<key>.pdf`. La date de
+    modification sert de date de dernier accès: les entrées les plus
+    anciennes sont supprimées quand le cache dépasse `max_bytes` ou
+    quand elles ont plus de `max_age` secondes.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 2 * 1024 ** 3, max_age: float = 7 * 24 * 3600):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @classmethod
+    def from_env(cls, root: Path) -> "ResultCache":
+        """Cache borné par AXO_CACHE_MAX_BYTES et AXO_CACHE_MAX_AGE (secondes)."""
+        return cls(
+            root,
+            max_bytes=int(os.getenv("AXO_CACHE_MAX_BYTES", str(2 * 1024 ** 3))),
+            max_age=float(os.getenv("AXO_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+        )
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def temp_path_for(self, key: str) -> Path:
+        """Chemin d'écriture temporaire, propre à chaque appel, à publier avec put()."""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def get(self, key: str) -> Optional[Path]:
+        """Retourne le chemin de l'entrée si elle existe et la marque comme utilisée."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, temp_path: Path) -> Path:
+        """Publie atomiquement un fichier produit dans temp_path, puis applique l'éviction.
+
+        L'entrée publiée n'est jamais évincée par cet appel, même si elle
+        dépasse à elle seule max_bytes: le chemin retourné existe.
+        """
+        path = self.path_for(key)
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Supprime les entrées expirées puis les moins récentes au-delà de max_bytes, sauf keep."""
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if path == keep or (total <= self.max_bytes and now - mtime <= self.max_age):
+                continue
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Impossible de supprimer {path}: {str(e)}")
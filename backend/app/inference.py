@@ -0,0 +1,425 @@
+# backend/app/inference.py
+"""Serveur d'inférence séparant les modèles des processus HTTP.
+
+Un processus (ou un petit pool) charge les modèles; les workers uvicorn,
+aussi nombreux que nécessaire, lui transmettent leurs requêtes via une
+connexion locale et ne chargent aucun modèle.
+
+    AXO_INFERENCE_ADDRESS=127.0.0.1:8765 python -m backend.app.inference
+    AXO_INFERENCE_ADDRESS=127.0.0.1:8765 uvicorn backend.app.main:app --workers 4
+
+Les tâches (suivi, progression, déduplication, contrôle d'admission)
+vivent dans le serveur: tous les workers HTTP voient les mêmes tâches, et
+une tâche soumise à l'un peut être suivie par un autre. Les variables
+AXO_TRANSLATION_WORKERS, AXO_MAX_JOBS et AXO_MAX_PENDING_PAGES se règlent
+donc côté serveur; AXO_TRANSLATION_WORKERS vaut par défaut le nombre de
+processus modèles (AXO_INFERENCE_PROCESSES).
+
+AXO_INFERENCE_AUTHKEY est obligatoire: les messages reçus sont désérialisés
+(pickle) après authentification, une clé connue permettrait d'exécuter du
+code dans le serveur. Un socket Unix est créé avec les droits 0600.
+
+Les métriques du pipeline (durées des étapes, pages, blocs...) sont
+mesurées dans les processus modèles: le serveur les agrège (mode
+multiprocessus de prometheus_client), y ajoute la profondeur de la file
+de tâches et les expose au format Prometheus sur
+AXO_INFERENCE_METRICS_ADDRESS (127.0.0.1:8766 par défaut, vide pour
+désactiver). Le /metrics des workers HTTP ne couvre que l'API.
+
+L'adresse peut aussi être le chemin d'un socket Unix. Les fichiers
+d'entrée et de sortie sont échangés par chemin: serveur et workers
+doivent partager le même système de fichiers et le même répertoire de
+travail (output/cache).
+"""
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from backend.app.cache import ResultCache
+from backend.app.jobs import Job, JobManager, QueueFullError
+from backend.app.tasks import translation_tasks
+
+Address = Union[str, Tuple[str, int]]
+
+# Requêtes des workers HTTP: (méthode, kwargs)
+JOB_METHODS = ("submit", "submit_or_join", "complete", "get", "check_admission", "pending")
+# Intervalle de surveillance des processus modèles (secondes)
+WATCH_INTERVAL = 5.0
+# Attente maximale d'une réponse du serveur (secondes)
+INFERENCE_TIMEOUT = float(os.getenv("AXO_INFERENCE_TIMEOUT", "60"))
+
+
+def parse_address(address: str) -> Address:
+    """'host:port' -> (host, port); tout autre valeur est un chemin de socket Unix."""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def _authkey() -> bytes:
+    authkey = os.getenv("AXO_INFERENCE_AUTHKEY")
+    if not authkey:
+        raise RuntimeError("AXO_INFERENCE_AUTHKEY doit être défini pour le serveur d'inférence et ses clients")
+    return authkey.encode("utf-8")
+
+
+def _receive(connection: Connection, timeout: Optional[float] = None) -> Tuple[str, Any]:
+    """Lit un message du serveur; RuntimeError si le serveur se tait ou ferme la connexion."""
+    timeout = INFERENCE_TIMEOUT if timeout is None else timeout
+    try:
+        if not connection.poll(timeout):
+            raise RuntimeError(f"Le serveur d'inférence ne répond plus depuis {timeout:.0f} s")
+        return connection.recv()
+    except (EOFError, OSError) as e:
+        raise RuntimeError(f"Connexion au serveur d'inférence perdue: {str(e)}") from e
+
+
+def _request(address: Address, method: str, **kwargs: Any) -> Any:
+    """Envoie une requête au serveur et retourne sa réponse; relève QueueFullError."""
+    with Client(address, authkey=_authkey()) as connection:
+        connection.send((method, kwargs))
+        kind, payload = _receive(connection)
+    if kind == "queue_full":
+        message, retry_after = payload
+        raise QueueFullError(message, retry_after)
+    if kind == "error":
+        raise RuntimeError(payload)
+    return payload
+
+
+def _model_worker(requests: "mp.Queue", replies: "mp.Queue") -> None:
+    """Processus propriétaire des modèles: traite les requêtes une par une."""
+    from backend.app.model.main import TranslationLayoutRecovery
+
+    model = TranslationLayoutRecovery(lazy=True)
+    # Publier la version des sorties avant le warmup: les workers HTTP en ont besoin pour leurs clés de cache
+    replies.put((None, "readiness", model.readiness()))
+    model.warmup()
+    replies.put((None, "readiness", model.readiness()))
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, (method, kwargs) = request
+        replies.put((request_id, "started", os.getpid()))
+
+        def progress(stage: str, **info) -> None:
+            replies.put((request_id, "progress", (stage, info)))
+
+        try:
+            getattr(model, method)(progress=progress, **kwargs)
+            replies.put((request_id, "done", None))
+        except Exception as e:
+            logging.exception(f"Erreur lors de la requête d'inférence {request_id}")
+            replies.put((request_id, "error", str(e)))
+        # Les traducteurs sont chargés à la demande: republier leur état
+        replies.put((None, "readiness", model.readiness()))
+
+
+class InferenceServer:
+    """Héberge les tâches de traduction et les exécute sur les processus modèles.
+
+    Les workers HTTP soumettent et consultent les tâches par des requêtes
+    courtes; chaque tâche tourne dans un thread du JobManager du serveur,
+    qui confie la traduction au premier processus modèle libre.
+
+    Parameters
+    ----------
+    address: Address
+        Adresse d'écoute (host, port) ou chemin de socket Unix
+    processes: int
+        Nombre de processus chargeant chacun une copie des modèles
+    metrics_address: Optional[Tuple[str, int]]
+        Adresse (host, port) de l'exposition des métriques des processus modèles;
+        aucune si None
+    """
+
+    def __init__(self, address: Address, processes: int = 1, metrics_address: Optional[Tuple[str, int]] = None):
+        self.address = address
+        self.processes = processes
+        self.metrics_address = metrics_address
+        self._requests: "mp.Queue" = mp.Queue()
+        self._replies: "mp.Queue" = mp.Queue()
+        # Messages de chaque requête en cours, lus par le thread de la tâche qui l'a émise
+        self._waiters: Dict[int, "queue.Queue"] = {}
+        # Processus modèle traitant chaque requête en cours
+        self._assigned: Dict[int, int] = {}
+        self._workers: List[mp.Process] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._readiness: Dict[str, Any] = {"ready": False, "models": {}}
+        # Même cache que l'API, qui sert les résultats publiés ici
+        self.job_manager = JobManager.from_env(
+            tasks=translation_tasks(self, ResultCache.from_env(Path("output") / "cache")),
+            default_workers=processes
+        )
+
+    def serve_forever(self) -> None:
+        authkey = _authkey()
+        if self.metrics_address is not None:
+            self._serve_metrics()
+        self._workers = [self._start_worker() for _ in range(self.processes)]
+        threading.Thread(target=self._dispatch_replies, daemon=True).start()
+        threading.Thread(target=self._watch_workers, daemon=True).start()
+
+        # Socket Unix accessible au seul utilisateur du serveur
+        umask = os.umask(0o177) if isinstance(self.address, str) else None
+        try:
+            listener = Listener(self.address, authkey=authkey)
+        finally:
+            if umask is not None:
+                os.umask(umask)
+        with listener:
+            logging.info(f"Serveur d'inférence en écoute sur {self.address}")
+            try:
+                while True:
+                    try:
+                        connection = listener.accept()
+                    except Exception as e:
+                        logging.warning(f"Connexion refusée: {str(e)}")
+                        continue
+                    threading.Thread(target=self._receive, args=(connection,), daemon=True).start()
+            finally:
+                self.job_manager.shutdown(wait=False)
+                for _ in self._workers:
+                    self._requests.put(None)
+
+    def _serve_metrics(self) -> None:
+        """Expose les métriques écrites par les processus modèles et la profondeur de la file.
+
+        Chaque processus écrit ses métriques dans PROMETHEUS_MULTIPROC_DIR,
+        vidé au démarrage; la variable doit être définie avant le premier
+        import de prometheus_client, hérité par les processus modèles.
+        """
+        metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if metrics_dir is None:
+            metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="axo-metrics-")
+        else:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+            os.makedirs(metrics_dir)
+        from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+        from prometheus_client.core import GaugeMetricFamily
+
+        job_manager = self.job_manager
+
+        class QueueDepthCollector:
+            def collect(self):
+                yield GaugeMetricFamily("axo_queue_depth", "Tâches de traduction en attente ou en cours",
+                                        value=job_manager.pending())
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(QueueDepthCollector())
+        host, port = self.metrics_address
+        start_http_server(port, addr=host, registry=registry)
+        logging.info(f"Métriques des processus modèles sur http://{host}:{port}/metrics")
+
+    def _start_worker(self) -> mp.Process:
+        worker = mp.Process(target=_model_worker, args=(self._requests, self._replies), daemon=True)
+        worker.start()
+        return worker
+
+    def _watch_workers(self) -> None:
+        """Remplace les processus modèles arrêtés.
+
+        Les requêtes d'un processus arrêté échouent au lieu d'attendre une
+        réponse qui ne viendra pas.
+        """
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            for i, worker in enumerate(self._workers):
+                if worker.is_alive():
+                    continue
+                logging.error(f"Processus modèle {worker.pid} arrêté (code {worker.exitcode}), redémarrage")
+                if self.metrics_address is not None:
+                    from prometheus_client import multiprocess
+                    multiprocess.mark_process_dead(worker.pid)
+                with self._lock:
+                    lost = [request_id for request_id, pid in self._assigned.items() if pid == worker.pid]
+                for request_id in lost:
+                    self._replies.put((request_id, "error",
+                                       f"Le processus modèle s'est arrêté (code {worker.exitcode})"))
+                self._workers[i] = self._start_worker()
+
+    def readiness(self) -> dict:
+        """État des modèles: prêt dès qu'un processus modèle l'est."""
+        with self._lock:
+            return dict(self._readiness)
+
+    def translate_pdf(self, progress: Optional[Callable[..., None]] = None, **kwargs: Any) -> None:
+        self._call_model("translate_pdf", progress, kwargs)
+
+    def translate_pdfs(self, progress: Optional[Callable[..., None]] = None, **kwargs: Any) -> None:
+        self._call_model("translate_pdfs", progress, kwargs)
+
+    def _call_model(self, method: str, progress: Optional[Callable[..., None]], kwargs: Dict[str, Any]) -> None:
+        """Confie une traduction aux processus modèles et relaie sa progression jusqu'à la fin."""
+        request_id = next(self._ids)
+        waiter: "queue.Queue" = queue.Queue()
+        with self._lock:
+            self._waiters[request_id] = waiter
+        self._requests.put((request_id, (method, kwargs)))
+        while True:
+            kind, payload = waiter.get()
+            if kind == "progress":
+                if progress is not None:
+                    stage, info = payload
+                    progress(stage, **info)
+            elif kind == "error":
+                raise RuntimeError(payload)
+            else:
+                return
+
+    def _receive(self, connection: Connection) -> None:
+        """Traite une requête d'un worker HTTP: état des modèles ou opération sur les tâches."""
+        with connection:
+            try:
+                method, kwargs = connection.recv()
+            except (EOFError, OSError, ValueError, TypeError):
+                return
+            try:
+                if method == "readiness":
+                    reply = ("done", self.readiness())
+                elif method in JOB_METHODS:
+                    reply = ("done", self._job_call(method, kwargs))
+                else:
+                    reply = ("error", f"unknown method {method!r}")
+            except QueueFullError as e:
+                reply = ("queue_full", (str(e), e.retry_after))
+            except Exception as e:
+                logging.exception(f"Erreur lors de la requête {method}")
+                reply = ("error", str(e))
+            try:
+                connection.send(reply)
+            except (EOFError, OSError):
+                pass
+
+    def _job_call(self, method: str, kwargs: Dict[str, Any]) -> Any:
+        """Applique une opération du JobManager; les tâches sont renvoyées figées."""
+        if method in ("submit", "submit_or_join"):
+            # Seules les tâches nommées du serveur peuvent être soumises
+            task, args = kwargs.pop("fn"), kwargs.pop("args")
+            if not isinstance(task, str):
+                raise ValueError("task must be given by name")
+            result = getattr(self.job_manager, method)(task, *args, **kwargs)
+        else:
+            result = getattr(self.job_manager, method)(**kwargs)
+        if isinstance(result, Job):
+            return self._snapshot(result)
+        if isinstance(result, tuple) and result and isinstance(result[0], Job):
+            return (self._snapshot(result[0]),) + result[1:]
+        return result
+
+    @staticmethod
+    def _snapshot(job: Job) -> Job:
+        # pages_done grandit pendant la tâche: copier la liste avant de sérialiser
+        return replace(job, pages_done=list(job.pages_done))
+
+    def _dispatch_replies(self) -> None:
+        """Renvoie progression et résultats au thread de la tâche qui a émis la requête."""
+        while True:
+            request_id, kind, payload = self._replies.get()
+            if kind == "readiness":
+                # Un processus modèle au moins prêt suffit pour servir des requêtes
+                with self._lock:
+                    self._readiness = {
+                        **self._readiness,
+                        **payload,
+                        "ready": self._readiness["ready"] or payload["ready"],
+                        "models": {**self._readiness["models"], **payload["models"]},
+                    }
+                continue
+            with self._lock:
+                if kind == "started":
+                    self._assigned[request_id] = payload
+                    continue
+                waiter = self._waiters.get(request_id)
+                if kind != "progress":
+                    self._waiters.pop(request_id, None)
+                    self._assigned.pop(request_id, None)
+            if waiter is not None:
+                waiter.put((kind, payload))
+
+
+class InferenceClient:
+    """Remplace TranslationLayoutRecovery dans un worker HTTP pour l'état des modèles du serveur."""
+
+    def __init__(self, address: Address):
+        self.address = address
+        # Version des sorties des modèles du serveur, connue après connect
+        self.model_version: Optional[str] = None
+
+    def connect(self) -> None:
+        """Attend que les processus modèles publient model_version.
+
+        La version dépend de leur configuration (quantification) et non de
+        celle du worker; elle entre dans les clés du cache de résultats.
+        """
+        deadline = time.monotonic() + INFERENCE_TIMEOUT
+        while self.model_version is None:
+            self.model_version = self.readiness().get("model_version")
+            if self.model_version is None:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Le serveur d'inférence n'a publié aucune version de modèle")
+                time.sleep(1)
+
+    def readiness(self) -> dict:
+        """État des modèles du serveur d'inférence."""
+        try:
+            return _request(self.address, "readiness")
+        except (OSError, EOFError, RuntimeError) as e:
+            return {"ready": False, "models": {}, "error": str(e)}
+
+
+class RemoteJobManager:
+    """Remplace JobManager dans un worker HTTP: les tâches vivent dans le serveur d'inférence.
+
+    Les tâches retournées sont des copies: les relire avec get pour suivre
+    leur avancement. Les fonctions sont désignées par leur nom
+    (voir backend/app/tasks.py).
+    """
+
+    def __init__(self, address: Address):
+        self.address = address
+
+    def submit(self, task: str, *args, key: Optional[str] = None, pages: int = 0) -> Job:
+        return _request(self.address, "submit", fn=task, args=args, key=key, pages=pages)
+
+    def submit_or_join(self, task: str, *args, key: str, pages: int = 0) -> Tuple[Job, bool]:
+        return _request(self.address, "submit_or_join", fn=task, args=args, key=key, pages=pages)
+
+    def complete(self, result: Dict[str, Any], key: Optional[str] = None) -> Job:
+        return _request(self.address, "complete", result=result, key=key)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return _request(self.address, "get", job_id=job_id)
+
+    def check_admission(self, pages: int = 0) -> None:
+        _request(self.address, "check_admission", pages=pages)
+
+    def pending(self) -> int:
+        return _request(self.address, "pending")
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Rien à arrêter: les tâches continuent dans le serveur."""
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    metrics_address = os.getenv("AXO_INFERENCE_METRICS_ADDRESS", "127.0.0.1:8766")
+    InferenceServer(
+        parse_address(os.getenv("AXO_INFERENCE_ADDRESS", "127.0.0.1:8765")),
+        processes=int(os.getenv("AXO_INFERENCE_PROCESSES", "1")),
+        metrics_address=parse_address(metrics_address) if metrics_address else None,
+    ).serve_forever()
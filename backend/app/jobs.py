@@ -0,0 +1,249 @@
+# backend/app/jobs.py
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+class JobStatus(str, Enum):
+    """États possibles d'une tâche de traduction."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Levée quand une tâche dépasse la capacité d'admission du serveur."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """Tâche de traduction soumise à l'exécuteur."""
+    id: str
+    key: Optional[str] = None
+    # Nombre de pages à traiter, utilisé pour le budget d'admission
+    pages: int = 0
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    stage: Optional[str] = None
+    current_page: Optional[int] = None
+    pages_total: Optional[int] = None
+    pages_done: List[Any] = field(default_factory=list)
+    # Incrémenté à chaque changement, pour que les flux de progression sachent quoi émettre
+    revision: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+    def report(self, stage: str, page: Optional[int] = None, pages_total: Optional[int] = None,
+               document: Optional[int] = None, **info) -> None:
+        """Callback de progression passé au pipeline de traduction.
+
+        Pour un lot de documents, les pages terminées sont notées [document, page].
+        """
+        if stage == "page_done":
+            self.pages_done.append(page if document is None else [document, page])
+        else:
+            self.stage = stage
+            if page is not None:
+                self.current_page = page
+        if pages_total is not None:
+            self.pages_total = pages_total
+        self.revision += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Représentation JSON de la tâche (sans le résultat)."""
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "stage": self.stage,
+            "current_page": self.current_page,
+            "pages_total": self.pages_total,
+            "pages_done": list(self.pages_done),
+        }
+
+
+class JobManager:
+    """Exécute les traductions sur un pool de threads borné.
+
+    Les modèles ne sont pas thread-safe: par défaut un seul worker traite
+    les tâches, les autres attendent dans la file de l'exécuteur. La boucle
+    d'événements d'uvicorn reste libre pour les uploads et les autres routes.
+
+    Parameters
+    ----------
+    max_workers: int
+        Nombre de traductions exécutées en parallèle
+    job_ttl: float
+        Durée (en secondes) pendant laquelle une tâche terminée reste consultable
+    max_jobs: Optional[int]
+        Nombre maximal de tâches en attente ou en cours; illimité si None
+    max_pending_pages: Optional[int]
+        Nombre maximal de pages en attente ou en cours; illimité si None
+    tasks: Optional[Dict[str, Callable[..., Dict[str, Any]]]]
+        Tâches pouvant être soumises par leur nom (voir backend/app/tasks.py)
+    """
+
+    # Estimation initiale du débit, avant la première tâche terminée
+    DEFAULT_SECONDS_PER_PAGE = 10.0
+
+    def __init__(self, max_workers: int = 1, job_ttl: float = 3600.0,
+                 max_jobs: Optional[int] = None, max_pending_pages: Optional[int] = None,
+                 tasks: Optional[Dict[str, Callable[..., Dict[str, Any]]]] = None):
+        self.max_workers = max_workers
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self.max_pending_pages = max_pending_pages
+        self.seconds_per_page = self.DEFAULT_SECONDS_PER_PAGE
+        self.tasks = tasks or {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translation")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, tasks: Optional[Dict[str, Callable[..., Dict[str, Any]]]] = None,
+                 default_workers: int = 1) -> "JobManager":
+        """File configurée par AXO_TRANSLATION_WORKERS, AXO_MAX_JOBS et AXO_MAX_PENDING_PAGES."""
+        return cls(
+            max_workers=int(os.getenv("AXO_TRANSLATION_WORKERS", str(default_workers))),
+            max_jobs=int(os.getenv("AXO_MAX_JOBS", "16")),
+            max_pending_pages=int(os.getenv("AXO_MAX_PENDING_PAGES", "200")),
+            tasks=tasks
+        )
+
+    def submit(self, fn: Union[str, Callable[..., Dict[str, Any]]], *args, key: Optional[str] = None,
+               pages: int = 0, **kwargs) -> Job:
+        """Ajoute une tâche à la file et retourne immédiatement.
+
+        fn, une fonction ou le nom d'une tâche de `tasks`, est appelée avec
+        la tâche en premier argument, pour pouvoir signaler son avancement
+        via job.report. Lève QueueFullError si la tâche dépasse le nombre de
+        tâches ou le budget de pages autorisés.
+        """
+        fn = self._task(fn)
+        with self._lock:
+            job = self._add(pages, key)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def submit_or_join(self, fn: Union[str, Callable[..., Dict[str, Any]]], *args, key: str,
+                       pages: int = 0, **kwargs) -> Tuple[Job, bool]:
+        """Comme submit, sauf si une tâche non terminée porte déjà cette clé.
+
+        Retourne (tâche, soumise): la tâche existante et False dans ce cas.
+        La recherche et la soumission sont faites sous le même verrou.
+        """
+        fn = self._task(fn)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and not job.finished:
+                    return job, False
+            job = self._add(pages, key)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job, True
+
+    def _task(self, fn: Union[str, Callable[..., Dict[str, Any]]]) -> Callable[..., Dict[str, Any]]:
+        if not isinstance(fn, str):
+            return fn
+        if fn not in self.tasks:
+            raise ValueError(f"unknown task {fn!r}")
+        return self.tasks[fn]
+
+    def _add(self, pages: int, key: Optional[str]) -> Job:
+        """Enregistre une nouvelle tâche en attente; à appeler sous le verrou."""
+        self._prune()
+        self._admit(pages)
+        job = Job(id=uuid.uuid4().hex, key=key, pages=pages)
+        self._jobs[job.id] = job
+        return job
+
+    def complete(self, result: Dict[str, Any], key: Optional[str] = None) -> Job:
+        """Enregistre une tâche déjà terminée (résultat servi depuis le cache)."""
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, key=key, status=JobStatus.DONE,
+                  started_at=now, finished_at=now, result=result)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def check_admission(self, pages: int = 0) -> None:
+        """Vérifie qu'une tâche de `pages` pages serait acceptée, sans la soumettre."""
+        with self._lock:
+            self._admit(pages)
+
+    def _admit(self, pages: int) -> None:
+        active = [job for job in self._jobs.values() if not job.finished]
+        pending_pages = sum(job.pages for job in active)
+        if self.max_jobs is not None and len(active) >= self.max_jobs:
+            raise QueueFullError("Trop de traductions en cours", self._retry_after(pending_pages))
+        if self.max_pending_pages is not None and active and pending_pages + pages > self.max_pending_pages:
+            # Attendre que suffisamment de pages soient traitées pour faire de la place
+            excess = pending_pages + pages - self.max_pending_pages
+            raise QueueFullError("Trop de pages en attente", self._retry_after(excess))
+
+    def _retry_after(self, pages: int) -> int:
+        """Délai estimé (secondes) pour traiter `pages` pages au débit observé."""
+        seconds = pages * self.seconds_per_page / self.max_workers
+        return int(min(max(math.ceil(seconds), 1), 600))
+
+    def pending(self) -> int:
+        """Nombre de tâches en attente ou en cours."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[..., Dict[str, Any]], args, kwargs) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        job.revision += 1
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = JobStatus.DONE
+        except Exception as e:
+            logging.exception(f"Erreur lors de la tâche {job.id}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = time.time()
+            job.revision += 1
+            if job.status == JobStatus.DONE and job.pages > 0:
+                # Moyenne mobile du temps par page, pour estimer Retry-After
+                observed = (job.finished_at - job.started_at) / job.pages
+                self.seconds_per_page = 0.8 * self.seconds_per_page + 0.2 * observed
+
+    def _prune(self) -> None:
+        """Supprime les tâches terminées depuis plus de job_ttl secondes."""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -1,17 +1,31 @@
 # backend/app/main.py
 import os
-import logging
+import json
+import asyncio
+import functools
+import threading
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 from pathlib import Path
 import tempfile
+import hashlib
+import zipfile
+from typing import List, Optional, Tuple
 import aiofiles
+import fitz
 
 # Import du modèle principal
 from backend.app.model.main import TranslationLayoutRecovery
+from backend.app.jobs import Job, JobManager, JobStatus, QueueFullError
+from backend.app.cache import ResultCache, result_key
+from backend.app.inference import InferenceClient, RemoteJobManager, parse_address
+from backend.app.metrics import CACHE_REQUESTS, QUEUE_DEPTH, REJECTED_REQUESTS
+from backend.app.tasks import translation_result, translation_tasks
+from backend.app.utils.pages import parse_page_selection
 
 # Création de l'application FastAPI
 app = FastAPI(
@@ -20,6 +34,86 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Limites des uploads: taille maximale et taille des morceaux lus
+MAX_UPLOAD_BYTES = int(os.getenv("AXO_MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Traduction par lots: nombre de documents et taille totale de la requête
+MAX_BATCH_DOCUMENTS = int(os.getenv("AXO_MAX_BATCH_DOCUMENTS", "50"))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("AXO_MAX_BATCH_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+
+# Flux de progression: fréquence de vérification et commentaire keepalive (secondes)
+SSE_POLL_INTERVAL = 0.5
+SSE_KEEPALIVE = 15.0
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimit:
+    """Middleware ASGI refusant (413) les requêtes dont le corps dépasse la limite de leur route.
+
+    Une requête annoncée trop grosse (Content-Length) est refusée avant la
+    lecture du corps. Sans Content-Length (envoi chunked), les octets sont
+    comptés au fil de la réception et la lecture s'arrête dès que la limite
+    est franchie: le corps n'est jamais reçu en entier.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def max_bytes(path: str) -> int:
+        return MAX_BATCH_UPLOAD_BYTES if path == "/translate/batch" else MAX_UPLOAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        max_bytes = self.max_bytes(scope["path"])
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_bytes:
+            await self.reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # L'application répond à l'interruption de la lecture (400 de l'analyse du
+            # formulaire, par exemple): cette réponse est remplacée par le 413
+            if exceeded and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self.reject(scope, receive, send)
+
+    @staticmethod
+    async def reject(scope, receive, send):
+        response = JSONResponse(status_code=413, content={"detail": "Le fichier est trop volumineux"})
+        await response(scope, receive, send)
+
+
+# Ajouté avant CORS, qui reste la couche externe: le 413 porte les en-têtes CORS
+app.add_middleware(UploadSizeLimit)
 # Configuration CORS pour permettre les requêtes depuis le frontend
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +121,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lu par le frontend pour espacer les nouvelles tentatives après un 429 ou un 503
+    expose_headers=["Retry-After"],
 )
 
 # Créer le dossier de sortie s'il n'existe pas
@@ -38,70 +134,405 @@ images_dir.mkdir(exist_ok=True)
 # Point de montage pour accéder aux fichiers générés
 app.mount("/output", StaticFiles(directory="output"), name="output")
 
-# Initialisation du modèle de traduction
-translation_model = TranslationLayoutRecovery()
+# Cache des PDF traduits, servi par le point de montage /output
+result_cache = ResultCache.from_env(output_dir / "cache")
 
+# Modèle de traduction et file de tâches: les traductions s'exécutent hors de la
+# boucle d'événements. AXO_MAX_JOBS et AXO_MAX_PENDING_PAGES bornent la file:
+# au-delà, réponse 429. Avec AXO_INFERENCE_ADDRESS, modèles et tâches vivent
+# dans le serveur d'inférence (backend/app/inference.py), partagé par tous les
+# workers HTTP
+if os.getenv("AXO_INFERENCE_ADDRESS"):
+    inference_address = parse_address(os.environ["AXO_INFERENCE_ADDRESS"])
+    translation_model = InferenceClient(inference_address)
+    job_manager = RemoteJobManager(inference_address)
+else:
+    # Les modèles sont chargés en arrière-plan après le démarrage (voir warmup_models)
+    translation_model = TranslationLayoutRecovery(lazy=True)
+    job_manager = JobManager.from_env(tasks=translation_tasks(translation_model, result_cache))
+    # Le modèle local garde l'état de la traduction en cours (langue, mode de sortie,
+    # progression): plusieurs workers se l'écraseraient
+    if job_manager.max_workers > 1:
+        raise RuntimeError("AXO_TRANSLATION_WORKERS > 1 nécessite le serveur d'inférence (AXO_INFERENCE_ADDRESS), "
+                           "dont chaque processus modèle traite une traduction à la fois")
+    QUEUE_DEPTH.set_function(job_manager.pending)
 
-async def save_upload_file(upload_file: UploadFile) -> str:
-    """Sauvegarde le fichier uploadé et retourne son chemin"""
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+
+async def save_upload_file(upload_file: UploadFile, suffix: str = '.pdf',
+                           max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[Optional[str], Optional[str]]:
+    """Sauvegarde le fichier uploadé par morceaux et retourne son chemin et son hash SHA-256.
+
+    Le hash est calculé au fil de l'écriture. Le corps de la requête est
+    déjà reçu à ce stade (UploadSizeLimit borne sa taille totale): la
+    vérification de max_bytes limite ici chaque fichier d'un lot.
+    """
+    fd, temp_file_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    sha256 = hashlib.sha256()
+    size = 0
     try:
-        contents = await upload_file.read()
-        with open(temp_file.name, 'wb') as f:
-            f.write(contents)
+        async with aiofiles.open(temp_file_path, 'wb') as f:
+            while True:
+                chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail="Le fichier est trop volumineux")
+                sha256.update(chunk)
+                await f.write(chunk)
+    except HTTPException:
+        os.unlink(temp_file_path)
+        raise
     except Exception:
-        return None
+        os.unlink(temp_file_path)
+        return None, None
     finally:
         await upload_file.close()
-    return temp_file.name
+    return temp_file_path, sha256.hexdigest()
+
+
+def extract_zip_pdfs(zip_path: str) -> List[Tuple[str, str, str]]:
+    """Extrait les PDF d'une archive zip; retourne (nom, chemin, hash SHA-256) pour chacun"""
+    documents = []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                    continue
+                if len(documents) >= MAX_BATCH_DOCUMENTS:
+                    raise ValueError(f"L'archive contient plus de {MAX_BATCH_DOCUMENTS} PDF")
+                fd, temp_file_path = tempfile.mkstemp(suffix='.pdf')
+                documents.append((info.filename, temp_file_path, None))
+                sha256 = hashlib.sha256()
+                size = 0
+                with os.fdopen(fd, "wb") as out, archive.open(info) as member:
+                    for chunk in iter(lambda: member.read(UPLOAD_CHUNK_SIZE), b""):
+                        # La taille annoncée par l'archive n'est pas fiable: compter les octets lus
+                        size += len(chunk)
+                        if size > MAX_UPLOAD_BYTES:
+                            raise ValueError(f"{info.filename} est trop volumineux")
+                        sha256.update(chunk)
+                        out.write(chunk)
+                documents[-1] = (info.filename, temp_file_path, sha256.hexdigest())
+    except Exception:
+        for _, temp_file_path, _ in documents:
+            os.unlink(temp_file_path)
+        raise
+    return documents
+
+
+def check_output_mode(output_mode: str) -> None:
+    if output_mode not in ("raster", "vector"):
+        raise HTTPException(status_code=400, detail="output_mode doit valoir 'raster' ou 'vector'")
+
+
+def overloaded(e: QueueFullError) -> HTTPException:
+    """Réponse 429 indiquant quand réessayer"""
+    REJECTED_REQUESTS.inc()
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def call_jobs(method, *args, **kwargs):
+    """Appelle le gestionnaire de tâches hors de la boucle d'événements.
+
+    En mode serveur d'inférence, chaque appel est un aller-retour vers le serveur.
+    """
+    return await asyncio.get_event_loop().run_in_executor(None, functools.partial(method, *args, **kwargs))
+
+
+def job_response(job: Job, status_code: int) -> JSONResponse:
+    """Réponse décrivant une tâche et les routes pour la suivre"""
+    return JSONResponse(status_code=status_code, content={
+        **job.to_dict(),
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+        "result_url": f"/jobs/{job.id}/result"
+    })
+
+
+@app.on_event("startup")
+def warmup_models():
+    """Charge le détecteur et l'OCR sans bloquer l'ouverture du serveur.
+
+    En mode serveur d'inférence, attend la version des modèles du serveur,
+    nécessaire aux clés du cache de résultats.
+    """
+    if isinstance(translation_model, TranslationLayoutRecovery):
+        threading.Thread(target=translation_model.warmup, name="warmup", daemon=True).start()
+    else:
+        translation_model.connect()
+
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.shutdown(wait=False)
+
+
+@app.get("/health")
+async def health():
+    """Vérifie que le serveur répond"""
+    return {"status": "ok", "pending_jobs": await call_jobs(job_manager.pending)}
 
 
-@app.post("/translate")
+@app.get("/metrics")
+async def metrics():
+    """Métriques au format texte Prometheus.
+
+    En mode serveur d'inférence, les métriques du pipeline et la profondeur
+    de la file sont exposées par le serveur d'inférence lui-même
+    (AXO_INFERENCE_METRICS_ADDRESS).
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/ready")
+async def ready():
+    """Indique si les modèles sont chargés; 503 tant que le warmup n'est pas terminé"""
+    readiness = await asyncio.get_event_loop().run_in_executor(None, translation_model.readiness)
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+
+@app.post("/translate", status_code=202)
 async def translate_pdf(
         file: UploadFile = File(...),
         page_number: int = Form(...),
+        pages: Optional[str] = Form(None),
         source_language: str = Form("English"),
-        target_language: str = Form("French")
+        target_language: str = Form("French"),
+        output_mode: str = Form("raster")
 ):
     """
-    Endpoint pour traduire une page de PDF
+    Endpoint pour traduire une page de PDF.
+    `pages` accepte une sélection ("1-3,5" ou "all") qui remplace `page_number`.
+    `output_mode` vaut "raster" (pages reconstruites en images) ou "vector"
+    (texte remplacé dans les pages d'origine, sélectionnable).
+    Retourne immédiatement l'identifiant de la tâche de traduction.
     """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
+    check_output_mode(output_mode)
 
-    # Créer le dossier de sortie PDF s'il n'existe pas
-    pdf_dir = output_dir / "PDFs"
-    pdf_dir.mkdir(exist_ok=True)
+    # Refuser avant de lire l'upload si la file est déjà pleine
+    try:
+        await call_jobs(job_manager.check_admission)
+    except QueueFullError as e:
+        raise overloaded(e)
 
     # Sauvegarder le fichier
-    temp_file_path = await save_upload_file(file)
+    temp_file_path, pdf_hash = await save_upload_file(file)
     if not temp_file_path:
         raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde du fichier")
 
+    # Valider la sélection de pages avant de mettre la tâche en file
+    try:
+        with fitz.open(temp_file_path) as doc:
+            page_count = doc.page_count
+    except Exception:
+        os.unlink(temp_file_path)
+        raise HTTPException(status_code=400, detail="Le fichier PDF est illisible")
+    try:
+        selected_pages = parse_page_selection(pages if pages is not None else str(page_number), page_count)
+    except ValueError as e:
+        os.unlink(temp_file_path)
+        raise HTTPException(status_code=400, detail=f"Sélection de pages invalide: {str(e)}")
+
+    language = target_language.lower()[:2]  # Utiliser seulement le code de langue (fr, ja, vi)
+    cache_key = result_key(pdf_hash, selected_pages, language, translation_model.model_version, output_mode)
+
+    # Servir directement un document déjà traduit
+    cached_path = result_cache.get(cache_key)
+    CACHE_REQUESTS.labels(cache="result", result="miss" if cached_path is None else "hit").inc()
+    if cached_path is not None:
+        os.unlink(temp_file_path)
+        job = await call_jobs(job_manager.complete, translation_result(cached_path, selected_pages, cached=True),
+                              key=cache_key)
+        return job_response(job, status_code=200)
+
+    # Rattacher la requête à une traduction identique déjà en cours, ou la soumettre
     try:
-        # Traduire le PDF
-        translation_model.translate_pdf(
-            input_path=temp_file_path,
-            language=target_language.lower()[:2],  # Utiliser seulement le code de langue (fr, ja, vi)
-            output_path=str(pdf_dir),
-            merge=False
+        job, submitted = await call_jobs(
+            job_manager.submit_or_join,
+            "translate",
+            temp_file_path,
+            language,
+            selected_pages,
+            cache_key,
+            output_mode,
+            key=cache_key,
+            pages=len(selected_pages)
         )
+    except QueueFullError as e:
+        os.unlink(temp_file_path)
+        raise overloaded(e)
+    if not submitted:
+        os.unlink(temp_file_path)
+    return job_response(job, status_code=202)
+
+
+@app.post("/translate/batch", status_code=202)
+async def translate_batch(
+        files: List[UploadFile] = File(...),
+        pages: str = Form("all"),
+        source_language: str = Form("English"),
+        target_language: str = Form("French"),
+        output_mode: str = Form("raster")
+):
+    """
+    Endpoint pour traduire plusieurs PDF (ou une archive zip de PDF) en une seule tâche.
+    Les pages de tous les documents sont traitées dans les mêmes lots; le résultat
+    de la tâche est un manifeste des PDF traduits.
+    """
+    check_output_mode(output_mode)
+    try:
+        await call_jobs(job_manager.check_admission)
+    except QueueFullError as e:
+        raise overloaded(e)
+
+    uploaded = []  # (nom, chemin, hash)
+    try:
+        for file in files:
+            name = file.filename or "document.pdf"
+            if file.content_type == "application/pdf":
+                temp_file_path, pdf_hash = await save_upload_file(file, max_bytes=MAX_UPLOAD_BYTES)
+                if not temp_file_path:
+                    raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde du fichier")
+                uploaded.append((name, temp_file_path, pdf_hash))
+            elif file.content_type in ("application/zip", "application/x-zip-compressed") or name.lower().endswith(".zip"):
+                zip_path, _ = await save_upload_file(file, suffix='.zip', max_bytes=MAX_BATCH_UPLOAD_BYTES)
+                if not zip_path:
+                    raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde du fichier")
+                try:
+                    uploaded.extend(await asyncio.get_event_loop().run_in_executor(None, extract_zip_pdfs, zip_path))
+                except (zipfile.BadZipFile, ValueError) as e:
+                    raise HTTPException(status_code=400, detail=f"Archive invalide: {str(e)}")
+                finally:
+                    os.unlink(zip_path)
+            else:
+                raise HTTPException(status_code=400, detail=f"{name}: le fichier doit être un PDF ou une archive zip")
 
-        # Préparer la réponse
-        translated_pdf_path = "output/PDFs/fitz_translated.pdf"
-        return JSONResponse(content={
+        if not uploaded:
+            raise HTTPException(status_code=400, detail="Aucun PDF à traduire")
+        if len(uploaded) > MAX_BATCH_DOCUMENTS:
+            raise HTTPException(status_code=400, detail=f"Un lot est limité à {MAX_BATCH_DOCUMENTS} documents")
+
+        language = target_language.lower()[:2]  # Utiliser seulement le code de langue (fr, ja, vi)
+        documents, cached = [], []
+        for index, (name, temp_file_path, pdf_hash) in enumerate(uploaded):
+            try:
+                with fitz.open(temp_file_path) as doc:
+                    page_count = doc.page_count
+                selected_pages = parse_page_selection(pages, page_count)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"{name}: sélection de pages invalide: {str(e)}")
+            except Exception:
+                raise HTTPException(status_code=400, detail=f"{name}: le fichier PDF est illisible")
+
+            cache_key = result_key(pdf_hash, selected_pages, language, translation_model.model_version,
+                                   output_mode)
+            cached_path = result_cache.get(cache_key)
+            CACHE_REQUESTS.labels(cache="result", result="miss" if cached_path is None else "hit").inc()
+            if cached_path is not None:
+                cached.append({
+                    "index": index,
+                    "name": name,
+                    "file_path": cached_path.as_posix(),
+                    "pages": selected_pages,
+                    "cached": True
+                })
+            else:
+                documents.append({
+                    "index": index,
+                    "name": name,
+                    "path": temp_file_path,
+                    "pages": selected_pages,
+                    "cache_key": cache_key
+                })
+    except Exception:
+        for _, temp_file_path, _ in uploaded:
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+        raise
+
+    # Les documents servis depuis le cache n'ont plus besoin de leur fichier temporaire
+    for entry in cached:
+        os.unlink(uploaded[entry["index"]][1])
+
+    if not documents:
+        job = await call_jobs(job_manager.complete, {
             "success": True,
             "message": "Traduction terminée avec succès",
-            "file_path": translated_pdf_path,
-            "page_number": page_number
+            "documents": cached
         })
-    except Exception as e:
-        logging.error(f"Erreur lors de la traduction: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Nettoyer le fichier temporaire
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        return job_response(job, status_code=200)
+
+    try:
+        job = await call_jobs(job_manager.submit, "translate_batch", documents, language, cached, output_mode,
+                              pages=sum(len(document["pages"]) for document in documents))
+    except QueueFullError as e:
+        for document in documents:
+            os.unlink(document["path"])
+        raise overloaded(e)
+    return job_response(job, status_code=202)
+
+
+async def get_job_or_404(job_id: str):
+    job = await call_jobs(job_manager.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche introuvable")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Retourne l'état d'une tâche de traduction"""
+    return (await get_job_or_404(job_id)).to_dict()
+
+
+async def job_events(job: Job):
+    """Émet l'état de la tâche à chaque changement, jusqu'à sa fin.
+
+    La tâche est relue à chaque vérification: en mode serveur d'inférence,
+    job n'est qu'une copie de l'état tenu par le serveur.
+    """
+    revision = -1
+    idle = 0.0
+    while True:
+        job = await call_jobs(job_manager.get, job.id) or job
+        finished = job.finished
+        if job.revision != revision:
+            revision = job.revision
+            idle = 0.0
+            yield f"event: {job.status.value}\ndata: {json.dumps(job.to_dict())}\n\n"
+        elif idle >= SSE_KEEPALIVE:
+            idle = 0.0
+            yield ": keepalive\n\n"
+        if finished:
+            break
+        await asyncio.sleep(SSE_POLL_INTERVAL)
+        idle += SSE_POLL_INTERVAL
+
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    """Flux server-sent events de l'avancement d'une tâche (étape et pages terminées)"""
+    job = await get_job_or_404(job_id)
+    return StreamingResponse(
+        job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Retourne le résultat d'une tâche terminée"""
+    job = await get_job_or_404(job_id)
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail="Traduction en cours")
+    return JSONResponse(content=job.result)
 
 
 if __name__ == "__main__":
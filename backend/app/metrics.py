@@ -0,0 +1,34 @@
+# backend/app/metrics.py
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Durée de chaque étape du pipeline de traduction
+STAGE_SECONDS = Histogram(
+    "axo_stage_seconds",
+    "Durée des étapes du pipeline de traduction",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+PAGES_PROCESSED = Counter("axo_pages_processed_total", "Pages traitées par le pipeline")
+BLOCKS_PROCESSED = Counter("axo_blocks_processed_total", "Blocs détectés traités par l'OCR", ["label"])
+CACHE_REQUESTS = Counter("axo_cache_requests_total", "Consultations des caches", ["cache", "result"])
+REJECTED_REQUESTS = Counter("axo_rejected_requests_total", "Requêtes refusées (429) par le contrôle d'admission")
+LOOPS_STOPPED = Counter(
+    "axo_translation_loops_stopped_total", "Séquences interrompues pendant la génération car elles bouclaient"
+)
+QUEUE_DEPTH = Gauge("axo_queue_depth", "Tâches de traduction en attente ou en cours")
+# Somme sur les processus modèles vivants quand le serveur d'inférence agrège leurs métriques
+MODEL_MEMORY_BYTES = Gauge("axo_model_memory_bytes", "Mémoire des paramètres des modèles chargés", ["model"],
+                           multiprocess_mode="livesum")
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Mesure la durée du bloc et l'enregistre dans l'histogramme des étapes."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
@@ -0,0 +1,107 @@
+# Model/analysis_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from backend.app.metrics import CACHE_REQUESTS
+
+# Blocs de texte (boîte en pixels, texte source) et titres (haut en pixels, texte)
+Analysis = Tuple[List[Tuple[List[int], str]], List[Tuple[int, str]]]
+
+
+def document_hash(input_path: Union[Path, str, bytes]) -> str:
+    """sha256 du contenu d'un PDF, donné par son chemin ou ses octets."""
+    sha256 = hashlib.sha256()
+    if isinstance(input_path, bytes):
+        sha256.update(input_path)
+        return sha256.hexdigest()
+    with open(input_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class AnalysisCache:
+    """Cache SQLite de l'analyse des pages scannées: détection et OCR.
+
+    L'analyse d'une page ne dépend pas de la langue cible: traduire le même
+    PDF vers une autre langue, ou après un changement du traducteur, ne
+    refait ni la détection ni l'OCR. Les entrées sont indexées par le hash
+    du document, le numéro de page et la version de l'analyse. La base garde
+    au plus `max_entries` pages, les moins récemment utilisées étant
+    supprimées en premier.
+    """
+
+    # Suppression par paquets, pour ne pas compter les entrées à chaque écriture
+    EVICT_EVERY = 100
+
+    def __init__(self, path: Union[Path, str], max_entries: int = 100_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, analysis TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+
+    @staticmethod
+    def key(doc_hash: str, page_number: int, version: str) -> str:
+        raw = "|".join([doc_hash, str(page_number), version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, doc_hash: str, page_number: int, version: str) -> Optional[Analysis]:
+        """Retourne (blocs de texte, titres) de la page, ou None si elle n'a pas été analysée."""
+        key = self.key(doc_hash, page_number, version)
+        with self._lock:
+            row = self._db.execute("SELECT analysis FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                with self._db:
+                    self._db.execute("UPDATE pages SET last_used = ? WHERE key = ?", (time.time(), key))
+        CACHE_REQUESTS.labels(cache="analysis", result="miss" if row is None else "hit").inc()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        return (
+            [(box, text) for box, text in data["text_blocks"]],
+            [(top, text) for top, text in data["title_blocks"]],
+        )
+
+    def put(self, doc_hash: str, page_number: int, version: str, analysis: Analysis) -> None:
+        text_blocks, title_blocks = analysis
+        data = json.dumps({
+            "text_blocks": [([int(v) for v in box], text) for box, text in text_blocks],
+            "title_blocks": [(int(top), text) for top, text in title_blocks],
+        }, ensure_ascii=False)
+        with self._lock:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                                 (self.key(doc_hash, page_number, version), data, time.time()))
+            self._writes += 1
+            if self._writes >= self.EVICT_EVERY:
+                self._writes = 0
+                self._evict()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _evict(self) -> None:
+        """Supprime les pages les moins récemment utilisées au-delà de max_entries."""
+        count = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        with self._db:
+            self._db.execute(
+                "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
@@ -0,0 +1,45 @@
+# Model/compositor.py
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from backend.app.model.text_fitting import FontMetrics
+
+# Bloc à dessiner: boîte en pixels, lignes déjà coupées, taille de police en pixels
+PlacedBlock = Tuple[Sequence[int], List[str], int]
+
+
+def compose_page(image: np.ndarray, blocks: Sequence[PlacedBlock], metrics: FontMetrics,
+                 line_spacing: int = 4) -> Image.Image:
+    """Dessine les blocs traduits sur la page, en une passe sur un seul tampon.
+
+    La page est convertie une fois en image PIL: chaque bloc y est effacé en
+    blanc puis son texte est écrit en place, sans image intermédiaire par
+    bloc. `image` n'est pas modifiée et peut servir d'original sans copie.
+    La page est retournée en image PIL, que RasterWriter encode telle quelle.
+    Un texte qui déborde de son bloc d'après les métriques de la police
+    (taille minimale atteinte) est rogné au bloc, pour ne pas recouvrir le
+    contenu voisin: seules les lignes, et dans chaque ligne les caractères,
+    qui y tiennent entièrement sont dessinées.
+    """
+    page = Image.fromarray(image)
+    draw = ImageDraw.Draw(page)
+    for box, lines, size in blocks:
+        x0, y0, x1, y1 = (int(v) for v in box)
+        if x1 <= x0 or y1 <= y0:
+            continue
+        draw.rectangle((x0, y0, x1 - 1, y1 - 1), fill=(255, 255, 255))
+        if not lines:
+            continue
+        line_height = metrics.line_height(size)
+        # Lignes entières dans la hauteur du bloc
+        lines = lines[:(y1 - y0 + line_spacing) // (line_height + line_spacing)]
+        clipped = []
+        for line in lines:
+            advances = np.cumsum(metrics.advances(line, size))
+            clipped.append(line[:int(np.searchsorted(advances, x1 - x0, side="right"))])
+        if any(clipped):
+            draw.text((x0, y0), "\n".join(clipped), font=metrics.font(size), fill=(0, 0, 0),
+                      spacing=line_spacing)
+    return page
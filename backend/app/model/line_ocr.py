@@ -0,0 +1,101 @@
+# Model/line_ocr.py
+from collections import defaultdict
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Hauteur minimale d'une ligne de texte (pixels à 300 DPI)
+MIN_LINE_HEIGHT = 8
+# Lignes vides tolérées à l'intérieur d'une ligne de texte (accents, points)
+MAX_LINE_GAP = 2
+# Part minimale de pixels d'encre pour qu'une rangée appartienne à une ligne
+MIN_ROW_INK = 0.002
+# Marge ajoutée autour de chaque ligne avant la reconnaissance
+LINE_PADDING = 3
+
+# (x_min, x_max, y_min, y_max), le format des horizontal_list d'EasyOCR
+LineBox = Tuple[int, int, int, int]
+
+
+def segment_lines(gray: np.ndarray) -> List[LineBox]:
+    """Découpe un bloc de texte en lignes par profil de projection horizontal.
+
+    gray est l'image du bloc en niveaux de gris. Retourne les boîtes des
+    lignes dans les coordonnées du bloc, de haut en bas.
+    """
+    if gray.size == 0:
+        return []
+    # Seuil entre le fond (clair) et l'encre: milieu entre le plus sombre et la médiane
+    threshold = (int(gray.min()) + int(np.median(gray))) // 2
+    ink = gray < threshold
+    if not ink.any():
+        return []
+    rows = ink.mean(axis=1) > MIN_ROW_INK
+
+    # Débuts et fins des suites de rangées avec encre
+    edges = np.diff(np.concatenate(([0], rows.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    runs = []
+    for start, end in zip(starts, ends):
+        if runs and start - runs[-1][1] <= MAX_LINE_GAP:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+
+    height, width = gray.shape
+    lines = []
+    for start, end in runs:
+        if end - start < MIN_LINE_HEIGHT:
+            continue
+        columns = np.flatnonzero(ink[start:end].any(axis=0))
+        lines.append((
+            max(int(columns[0]) - LINE_PADDING, 0),
+            min(int(columns[-1]) + 1 + LINE_PADDING, width),
+            max(int(start) - LINE_PADDING, 0),
+            min(int(end) + LINE_PADDING, height),
+        ))
+    return lines
+
+
+def recognize_blocks(reader, page_gray: np.ndarray, boxes: Sequence[Sequence[int]],
+                     batch_size: int = 64) -> List[List[str]]:
+    """Reconnaît le texte de plusieurs blocs d'une page en un seul appel au reconnaisseur.
+
+    Chaque bloc (x0, y0, x1, y1 en pixels de la page) est découpé en lignes
+    par segment_lines; toutes les lignes de la page passent ensuite par
+    reader.recognize, sans le détecteur CRAFT d'EasyOCR.
+
+    Returns
+    -------
+    Le texte de chaque ligne, pour chaque bloc; une liste vide si le bloc ne
+    contient pas de texte.
+    """
+    height, width = page_gray.shape
+    owners = defaultdict(list)
+    horizontal_list = []
+    for index, box in enumerate(boxes):
+        x0, y0 = max(int(box[0]), 0), max(int(box[1]), 0)
+        x1, y1 = min(int(box[2]), width), min(int(box[3]), height)
+        for x_min, x_max, y_min, y_max in segment_lines(page_gray[y0:y1, x0:x1]):
+            line = (x0 + x_min, x0 + x_max, y0 + y_min, y0 + y_max)
+            # Une ligne commune à deux blocs qui se chevauchent n'est reconnue qu'une fois
+            if line not in owners:
+                horizontal_list.append(list(line))
+            owners[line].append((index, y_min))
+
+    texts = [[] for _ in boxes]
+    if not horizontal_list:
+        return texts
+    results = reader.recognize(page_gray, horizontal_list=horizontal_list, free_list=[],
+                               batch_size=batch_size, detail=1, paragraph=False)
+
+    # EasyOCR peut réordonner les lignes: chaque résultat est rattaché à son bloc par sa boîte
+    found = [[] for _ in boxes]
+    for points, text, _ in results:
+        line = (int(points[0][0]), int(points[1][0]), int(points[0][1]), int(points[2][1]))
+        for index, top in owners.get(line, []):
+            found[index].append((top, text))
+    for index, lines in enumerate(found):
+        texts[index] = [text for _, text in sorted(lines, key=lambda line: line[0]) if text]
+    return texts
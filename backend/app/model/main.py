@@ -1,18 +1,24 @@
 # Model/main.py
 
-import copy
-import math
 import re
 from pathlib import Path
-from typing import List, Tuple, Union
-import matplotlib.pyplot as plt
+from typing import Callable, List, Optional, Sequence, Union
 import numpy as np
-from pdf2image import convert_from_bytes, convert_from_path
-from PIL import Image, ImageDraw, ImageFont
 from tqdm import tqdm
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from backend.app.utils.textwrap_japanese import fw_fill_ja
-from backend.app.utils.textwrap_vietnamese import fw_fill_vi
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, LogitsProcessorList
+from backend.app.utils.repetition import repeated_substring
+from backend.app.model.analysis_cache import AnalysisCache, document_hash
+from backend.app.model.compositor import compose_page
+from backend.app.model.line_ocr import recognize_blocks
+from backend.app.model.pipeline import Pipeline, Stage
+from backend.app.model.raster_writer import RasterWriter
+from backend.app.model.rasterizer import RegionRenderer, iter_pages, page_count
+from backend.app.model.repetition_guard import LoopBreaker
+from backend.app.model.text_fitting import FontMetrics, TextFitter
+from backend.app.model.translation_memory import TranslationMemory
+from backend.app.model.vector_writer import VectorWriter
+from backend.app.metrics import (BLOCKS_PROCESSED, LOOPS_STOPPED, MODEL_MEMORY_BYTES, PAGES_PROCESSED, STAGE_SECONDS,
+                                 stage_timer)
 import torchvision
 from torchvision.models.detection.faster_rcnn import FastRCNNPredictor
 from torchvision.models.detection.mask_rcnn import MaskRCNNPredictor
@@ -22,6 +28,8 @@ import torch
 import random
 import cv2
 import os
+import threading
+import time
 import fitz
 import easyocr
 
@@ -72,8 +80,8 @@ class TranslationLayoutRecovery:
 
     Attributs from _load_init()
     ----------
-    font: ImageFont
-        Font for drawing text on the image
+    fitter_ja, fitter_vi: TextFitter
+        Font size and line breaks of the translated text, per language
     ocr_model: EasyOCR
         OCR model for detecting text in the text blocks
     translate_model:
@@ -82,28 +90,95 @@ class TranslationLayoutRecovery:
         Tokenizer for decoding the output of the translation model
     """
     DPI = 300
+    # Pages rendues à l'avance pendant la détection
+    PREFETCH_PAGES = 2
+    # Utiliser la couche texte des PDF natifs au lieu de la détection et de l'OCR
+    USE_TEXT_LAYER = True
+    # Nombre minimal de mots pour traduire un bloc de la couche texte
+    TEXT_LAYER_MIN_WORDS = 4
+    # OCR des blocs détectés par segmentation en lignes et reconnaissance seule, par lot
+    OCR_RECOGNITION_ONLY = True
+    OCR_BATCH_SIZE = 64
+    # Résolution du rendu des pages scannées pour la détection en mode vectoriel
+    # (la détection ramène de toute façon la page à 1000 pixels de haut)
+    DETECT_DPI = 100
+    # Nombre maximal de pages par passe de détection
+    DETECT_BATCH_SIZE = 8
+    # Pages en attente entre deux étapes du pipeline (un lot complet devant une étape par lots)
+    PIPELINE_QUEUE_SIZE = 2
+    # Pages en cours dans tout le pipeline, files comprises: une page raster à DPI pèse ~25 Mo
+    PIPELINE_MAX_PAGES = int(os.getenv("AXO_PIPELINE_MAX_PAGES", "12"))
+    # Pages ajoutées au PDF de sortie entre deux écritures incrémentales sur disque;
+    # 0 pour l'écrire une fois à la fin
+    PDF_FLUSH_EVERY = int(os.getenv("AXO_PDF_FLUSH_EVERY", "0"))
+    # Segments traduits par appel à generate, et pages dont les segments sont regroupés
+    TRANSLATE_BATCH_SIZE = int(os.getenv("AXO_TRANSLATE_BATCH_SIZE", "16"))
+    TRANSLATE_PAGE_BATCH_SIZE = 4
+    # Périphérique d'inférence ("cuda", "cuda:1", "cpu"); GPU par défaut s'il y en a un
+    DEVICE = os.getenv("AXO_DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+    # Threads intra-op en mode CPU; 0 répartit les cœurs entre les étapes modèle du pipeline
+    CPU_THREADS = int(os.getenv("AXO_CPU_THREADS", "0"))
+    # Quantification dynamique int8 des couches linéaires, en mode CPU uniquement
+    QUANTIZE = os.getenv("AXO_QUANTIZE", "0") == "1"
+    TRANSLATION_MODELS = {"ja": "Helsinki-NLP/opus-mt-en-jap", "vi": "VietAI/envit5-translation"}
+    # Mémoire de traduction par segment (SQLite); chemin vide pour la désactiver
+    TRANSLATION_MEMORY_PATH = os.getenv("AXO_TRANSLATION_MEMORY", os.path.join("output", "translation_memory.sqlite3"))
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("AXO_TRANSLATION_MEMORY_MAX_ENTRIES", "500000"))
+    # Analyse des pages scannées (détection et OCR) réutilisée quelle que soit la langue;
+    # chemin vide pour la désactiver
+    ANALYSIS_CACHE_PATH = os.getenv("AXO_ANALYSIS_CACHE", os.path.join("output", "analysis_cache.sqlite3"))
+    ANALYSIS_CACHE_MAX_PAGES = int(os.getenv("AXO_ANALYSIS_CACHE_MAX_PAGES", "100000"))
+    # Identifie la détection et l'OCR; à changer dès que l'analyse d'une page peut différer
+    ANALYSIS_VERSION = "publaynet-196000/easyocr-en/v1"
+    # Identifie les poids et le pipeline; à changer dès qu'une sortie peut différer.
+    # Les clés du cache de résultats utilisent model_version, propre à l'instance
+    MODEL_VERSION = "publaynet-196000/easyocr-en/opus-mt-en-jap/envit5-translation/v11"
+    # Taille de police maximale (pixels à DPI); le texte est réduit jusqu'à MIN_FONT_SCALE pour tenir dans son bloc
     FONT_SIZE_VIETNAMESE = 34
     FONT_SIZE_JAPANESE = 28
+    MIN_FONT_SCALE = 0.6
 
-    def __init__(self):
-        self._load_init()
-
-    def _repeated_substring(self, s: str):
-        """Vérifie la présence de sous-chaînes répétées qui pourraient indiquer une erreur de traduction."""
-        n = len(s)
-        for i in range(10, n // 2 + 1):
-            pattern = s[:i]
-            matches = [match for match in re.finditer(rf'\b{re.escape(pattern)}\b', s)]
-            if len(matches) >= 15:
-                return True
-        for i in range(n // 2 + 11, n):
-            pattern = s[n // 2 + 1:i]
-            matches = [match for match in re.finditer(rf'\b{re.escape(pattern)}\b', s)]
-            if len(matches) >= 15:
-                return True
-        return False
-
-    def translate_pdf(self, input_path: Union[Path, bytes], language: str, output_path: Path, merge: bool) -> None:
+    def __init__(self, lazy: bool = False, device: Optional[str] = None, quantize: Optional[bool] = None):
+        """Charge tous les modèles, ou aucun si lazy (voir warmup et _ensure_models).
+
+        device et quantize remplacent DEVICE et QUANTIZE.
+        """
+        self.device = device or self.DEVICE
+        self.quantize = self.QUANTIZE if quantize is None else quantize
+        if self.device == "cpu":
+            # Détection, OCR et traduction tournent en parallèle dans le pipeline
+            torch.set_num_threads(self.CPU_THREADS or max(1, (os.cpu_count() or 1) // 3))
+        elif self.quantize:
+            print("Quantization is only supported on CPU, ignored on", self.device)
+            self.quantize = False
+        # Version des sorties de cette instance: les modèles quantifiés traduisent autrement
+        self.model_version = self.MODEL_VERSION + ("/int8" if self.quantize else "")
+        self.model_states = {name: "not_loaded" for name in ("detector", "ocr", "translator_ja", "translator_vi")}
+        self._load_lock = threading.Lock()
+        # Langue, mode de sortie et callback de progression d'un appel sont lus par les
+        # étapes du pipeline sur l'instance: une seule traduction à la fois
+        self._translate_lock = threading.Lock()
+        self.warmed_up = False
+        self.output_mode = "raster"
+        self.merge = False
+        self.translation_memory = TranslationMemory(
+            self.TRANSLATION_MEMORY_PATH, max_entries=self.TRANSLATION_MEMORY_MAX_ENTRIES
+        ) if self.TRANSLATION_MEMORY_PATH else None
+        self.analysis_cache = AnalysisCache(
+            self.ANALYSIS_CACHE_PATH, max_entries=self.ANALYSIS_CACHE_MAX_PAGES
+        ) if self.ANALYSIS_CACHE_PATH else None
+
+        # Transformation pour le modèle
+        self.transform = transforms.Compose([
+            transforms.ToPILImage(),
+            transforms.ToTensor()
+        ])
+        if not lazy:
+            self._load_init()
+
+    def translate_pdf(self, input_path: Union[Path, bytes], language: str, merge: bool,
+                      pages: Optional[Sequence[int]] = None, output_file: Optional[str] = None,
+                      progress: Optional[Callable[..., None]] = None, output_mode: str = "raster") -> None:
         """Fonction principale pour traduire des fichiers PDF.
 
         La traduction est effectuée selon les étapes suivantes:
@@ -111,8 +186,7 @@ class TranslationLayoutRecovery:
             2. Détecter les blocs de texte dans les images
             3. Pour chaque bloc de texte, détecter le texte et le traduire
             4. Dessiner le texte traduit sur l'image
-            5. Sauvegarder l'image en fichier PDF
-            6. Fusionner tous les fichiers PDF en un seul
+            5. Ajouter l'image au PDF de sortie
 
         À l'étape 3, cette fonction ne traduit pas le texte après
         la section références. Au lieu de cela, elle sauvegarde l'image telle quelle.
@@ -121,65 +195,267 @@ class TranslationLayoutRecovery:
         ----------
         input_path: Union[Path, bytes]
             Path to the input PDF file or bytes of the input PDF file
-        output_path: Path
-            Path to the output directory
+        pages: Optional[Sequence[int]]
+            Page numbers (1-based) to translate; all pages when None
+        output_file: Optional[str]
+            Path of the translated PDF; output/PDFs/fitz_translated.pdf when None
+        progress: Optional[Callable[..., None]]
+            Called as progress(stage, **info) at each stage and for each finished page
+        output_mode: str
+            "raster" rebuilds each page as an image; "vector" keeps the original
+            page and replaces the translated blocks in place (see VectorWriter)
+        """
+        self.translate_pdfs(
+            documents=[{
+                "input_path": input_path,
+                "pages": pages,
+                "output_file": output_file or os.path.join("output", "PDFs", "fitz_translated.pdf"),
+            }],
+            language=language,
+            merge=merge,
+            progress=progress,
+            output_mode=output_mode,
+        )
+
+    def translate_pdfs(self, documents: Sequence[dict], language: str, merge: bool,
+                       progress: Optional[Callable[..., None]] = None, output_mode: str = "raster") -> None:
+        """Traduit plusieurs PDF en regroupant leurs pages dans les mêmes lots.
+
+        Un lot peut contenir des pages de plusieurs documents, pour que la
+        détection travaille sur des lots pleins même avec des documents
+        courts. Chaque document s'arrête à sa propre section références.
+        Les appels concurrents sur une même instance s'exécutent l'un après
+        l'autre.
+
+        Parameters
+        ----------
+        documents: Sequence[dict]
+            Each document has the keys "input_path", "output_file" and optionally "pages"
+        progress: Optional[Callable[..., None]]
+            Called as progress(stage, **info); page_done events carry a "document"
+            index when several documents are translated
+        output_mode: str
+            "raster" or "vector", as in translate_pdf
         """
-        pdf_images = convert_from_path(input_path, dpi=self.DPI)
+        if output_mode not in ("raster", "vector"):
+            raise ValueError(f"unknown output mode {output_mode!r}")
+        if merge and output_mode == "vector":
+            raise ValueError("merge is only supported with the raster output mode")
+        with self._translate_lock:
+            self._translate_pdfs(documents, language, merge, progress, output_mode)
+
+    def _translate_pdfs(self, documents: Sequence[dict], language: str, merge: bool,
+                        progress: Optional[Callable[..., None]], output_mode: str) -> None:
+        self.output_mode = output_mode
+        self.merge = merge
+        self.progress = progress
+        self._report("load_models")
+        self._ensure_models(language)
         print("Language:", language)
         self.language = language
-        pdf_files = []
-        reached_references = False
-
-        # Batch
-        idx = 0
-        file_id = 0
-        batch_size = 8
-        for _ in tqdm(range(math.ceil(len(pdf_images) / batch_size))):
-            image_list = pdf_images[idx:idx + batch_size]
-            if not reached_references:
-                image_list, reached_references = self._translate_multiple_pages(
-                    image_list=image_list,
-                    reached_references=reached_references,
-                )
-                if merge:
-                    # merge original and translated images into 1 page
-                    for _, [translated_image, original_image] in enumerate(image_list):
-                        saved_output_path = os.path.join(output_path, f"{file_id:03}.pdf")
-                        fig, ax = plt.subplots(1, 2, figsize=(20, 14))
-                        ax[0].imshow(original_image)
-                        ax[1].imshow(translated_image)
-                        ax[0].axis("off")
-                        ax[1].axis("off")
-                        plt.tight_layout()
-                        plt.savefig(saved_output_path, format="pdf", dpi=self.DPI)
-                        plt.close(fig)
-                        pdf_files.append(saved_output_path)
-                        file_id += 1
+
+        pages_total = sum(
+            len(set(document["pages"])) if document.get("pages") is not None else page_count(document["input_path"])
+            for document in documents
+        )
+        self._report("rasterize", pages_total=pages_total)
+
+        # Chaque page est ajoutée au PDF de son document dès qu'elle est composée
+        raster_writers = {}
+        vector_writers = {}
+        reached_references = set()
+        # Chaque étape tourne dans son propre thread et les pages avancent de l'une à
+        # l'autre par des files bornées: le débit est fixé par l'étape la plus lente.
+        # Le rendu tourne dans le thread de iter_pages, l'écriture dans ce thread-ci.
+        # Rendu à DPI des zones de texte des pages détectées en basse résolution, par document
+        region_renderers = {}
+        pipeline = Pipeline([
+            Stage("detect", self._detect_stage, batch_size=self.DETECT_BATCH_SIZE),
+            Stage("ocr", lambda pages: [self._ocr_stage(page, reached_references, region_renderers) for page in pages]),
+            Stage("translate", self._translate_stage, batch_size=self.TRANSLATE_PAGE_BATCH_SIZE),
+            Stage("compose", lambda pages: [self._compose_stage(page) for page in pages]),
+        ], queue_size=self.PIPELINE_QUEUE_SIZE, max_in_flight=self.PIPELINE_MAX_PAGES)
+
+        try:
+            progress_bar = tqdm(total=pages_total)
+            for page in pipeline.run(self._iter_pages(documents, reached_references)):
+                progress_bar.update(1)
+                doc_id, page_number = page["doc_id"], page["page_number"]
+                translated_image, original_image = page["translated"], page["original"]
+                if output_mode == "vector":
+                    # translated contient ici les blocs traduits (boîte, texte)
+                    if doc_id not in vector_writers:
+                        vector_writers[doc_id] = self._vector_writer(documents[doc_id]["input_path"])
+                    with stage_timer("write"):
+                        vector_writers[doc_id].add_page(page_number, translated_image)
+                    self._report_page_done(page_number, doc_id, len(documents))
+                    continue
+
+                if doc_id not in raster_writers:
+                    raster_writers[doc_id] = RasterWriter(documents[doc_id]["output_file"], self.DPI,
+                                                          flush_every=self.PDF_FLUSH_EVERY)
+                with stage_timer("write"):
+                    # Avec merge, page d'origine et page traduite côte à côte
+                    raster_writers[doc_id].add_page(translated_image, original=original_image)
+                self._report_page_done(page_number, doc_id, len(documents))
+
+            progress_bar.close()
+        finally:
+            for renderer in region_renderers.values():
+                renderer.close()
+
+        self._report("merge")
+        for doc_id, document in enumerate(documents):
+            with stage_timer("merge"):
+                if output_mode == "vector":
+                    vector_writers[doc_id].save(document["output_file"])
                 else:
-                    # convert image to pdf
-                    for _, [translated_image, _] in enumerate(image_list):
-                        saved_output_path = os.path.join(output_path, f"{file_id:03}.pdf")
-                        pil_image = Image.fromarray(translated_image)
-                        pil_image = pil_image.convert("RGB")
-                        pil_image.save(saved_output_path)
-                        pdf_files.append(saved_output_path)
-                        file_id += 1
-            idx += batch_size
-
-        self._merge_pdfs(pdf_files)
+                    raster_writers[doc_id].save()
+
+    def _vector_writer(self, input_path: Union[Path, bytes]) -> VectorWriter:
+        """Crée le writer vectoriel d'un document avec la police de la langue cible."""
+        if self.language == "ja":
+            return VectorWriter(input_path, self.DPI, self.font_path_ja, self.FONT_SIZE_JAPANESE)
+        return VectorWriter(input_path, self.DPI, self.font_path_vi, self.FONT_SIZE_VIETNAMESE)
+
+    def _report_page_done(self, page_number: int, doc_id: int, n_documents: int) -> None:
+        if n_documents > 1:
+            self._report("page_done", page=page_number, document=doc_id)
+        else:
+            self._report("page_done", page=page_number)
+
+    def _report(self, stage: str, **info) -> None:
+        """Transmet l'avancement au callback fourni à translate_pdf, s'il y en a un."""
+        if getattr(self, "progress", None) is not None:
+            self.progress(stage, **info)
+
+    def _iter_pages(self, documents: Sequence[dict], reached_references: set):
+        """Enchaîne les pages de tous les documents, sous forme de dict traversant le pipeline.
+
+        Chaque page a les clés "doc_id", "input_path", "doc_hash", "page_number",
+        "image", "text_layer" (blocs de la couche texte, ou None), "analysis"
+        (détection et OCR d'une page scannée déjà analysée, ou None) et "scale"
+        (résolution de l'image rapportée à DPI). Le rendu d'un document s'arrête
+        dès qu'il a atteint ses références.
+        """
+        # En mode vectoriel, la page entière n'est pas nécessaire à DPI: la détection
+        # travaille sur un rendu basse résolution et seules les zones de texte sont
+        # rendues à DPI pour l'OCR
+        scan_dpi = self.DETECT_DPI if self.output_mode == "vector" else None
+        for doc_id, document in enumerate(documents):
+            doc_hash = document_hash(document["input_path"]) if self.analysis_cache is not None else None
+            # En mode vectoriel, les pages avec couche texte n'ont pas besoin d'être rendues
+            pages = iter_pages(document["input_path"], document.get("pages"), self.DPI,
+                               prefetch=self.PREFETCH_PAGES, text_layer=self.USE_TEXT_LAYER,
+                               render_text_pages=self.output_mode != "vector", scan_dpi=scan_dpi)
+            try:
+                for page_number, image, text_blocks in pages:
+                    if doc_id in reached_references:
+                        break
+                    analysis = None
+                    if doc_hash is not None and text_blocks is None:
+                        analysis = self.analysis_cache.get(doc_hash, page_number, self.analysis_version)
+                    yield {"doc_id": doc_id, "input_path": document["input_path"], "doc_hash": doc_hash, "page_number": page_number, "image": image,
+                           "text_layer": text_blocks, "analysis": analysis,
+                           "scale": scan_dpi / self.DPI if scan_dpi and text_blocks is None else 1.0}
+            finally:
+                pages.close()
+
+    @property
+    def analysis_version(self) -> str:
+        """Version des analyses en cache pour les réglages courants.
+
+        Le mode de sortie en fait partie: en mode vectoriel, la détection
+        travaille sur un rendu à DETECT_DPI et l'OCR sur des zones rendues à
+        DPI, ce qui ne donne pas les mêmes blocs qu'en mode raster.
+        """
+        return "/".join([
+            self.ANALYSIS_VERSION,
+            f"dpi={self.DPI}",
+            f"detect-dpi={self.DETECT_DPI if self.output_mode == 'vector' else self.DPI}",
+            self.output_mode,
+            "line-ocr" if self.OCR_RECOGNITION_ONLY else "readtext",
+            "int8" if self.quantize else "float32",
+        ])
 
     def _load_init(self):
         """Fonction qui charge les modèles nécessaires pour la traduction."""
-        # Chargement des polices
-        self.font_ja = ImageFont.truetype(
-            "C:\\Users\\herve\\OneDrive - Universite de Montreal\\Github\\Axo\\backend\\fonts\\Source Han Serif CN Light.otf",
-            size=self.FONT_SIZE_JAPANESE,
-        )
-        self.font_vi = ImageFont.truetype(
-            "C:\\Users\\herve\\OneDrive - Universite de Montreal\\Github\\Axo\\backend\\fonts\\AlegreyaSans-Regular.otf",
-            size=self.FONT_SIZE_VIETNAMESE,
+        for name in self.model_states:
+            self._ensure_loaded(name)
+
+    def _ensure_loaded(self, name: str) -> None:
+        """Charge un modèle à la première utilisation et met à jour son état."""
+        if self.model_states[name] == "ready":
+            return
+        with self._load_lock:
+            if self.model_states[name] == "ready":
+                return
+            self.model_states[name] = "loading"
+            try:
+                if name == "detector":
+                    self._load_detector()
+                elif name == "ocr":
+                    self._load_ocr()
+                else:
+                    self._load_translator(name[len("translator_"):])
+            except Exception:
+                self.model_states[name] = "failed"
+                raise
+            self.model_states[name] = "ready"
+        self._record_memory(name)
+
+    def _record_memory(self, name: str) -> None:
+        """Publie la taille des paramètres d'un modèle chargé."""
+        if name == "detector":
+            modules = [self.pub_model]
+        elif name == "ocr":
+            modules = [self.ocr_model.detector, self.ocr_model.recognizer]
+        elif name == "translator_ja":
+            modules = [self.translate_model_ja]
+        else:
+            modules = [self.translate_model_vi]
+        size = sum(
+            p.numel() * p.element_size()
+            for module in modules if isinstance(module, torch.nn.Module)
+            for p in module.parameters()
         )
+        MODEL_MEMORY_BYTES.labels(model=name).set(size)
+
+    def _ensure_models(self, language: str) -> None:
+        """Charge les modèles nécessaires pour traduire vers cette langue."""
+        self._ensure_loaded("detector")
+        self._ensure_loaded("ocr")
+        self._ensure_loaded("translator_ja" if language == "ja" else "translator_vi")
 
+    def warmup(self) -> None:
+        """Charge le détecteur et l'OCR puis exécute une inférence à vide.
+
+        Les traducteurs restent chargés à la demande, par langue.
+        """
+        try:
+            self._ensure_loaded("detector")
+            self._ensure_loaded("ocr")
+            blank = np.full((1000, 772, 3), 255, dtype=np.uint8)
+            with torch.no_grad():
+                self.pub_model([self.transform(blank).to(self.device)])
+            self.ocr_model.readtext(blank[:64, :256])
+            self.warmed_up = True
+        except Exception as e:
+            print("Warmup failed:", str(e))
+
+    def readiness(self) -> dict:
+        """État de chaque modèle; prêt quand le détecteur et l'OCR ont fait leur warmup."""
+        return {
+            "ready": self.warmed_up,
+            "models": dict(self.model_states),
+            "device": self.device,
+            "quantized": self.quantize,
+            "model_version": self.model_version,
+            "translation_memory": self.translation_memory.stats() if self.translation_memory is not None else None,
+        }
+
+    def _load_detector(self):
+        """Charge le modèle de détection de mise en page."""
         # Modèle de détection: PubLayNet
         self.num_classes = len(CATEGORIES2LABELS.keys())
         self.pub_model = get_instance_segmentation_model(self.num_classes)
@@ -200,243 +476,371 @@ class TranslationLayoutRecovery:
         # Puis garder la ligne d'origine:
         checkpoint = torch.load(self.checkpoint_path, map_location='cpu')
         self.pub_model.load_state_dict(checkpoint['model'])
-        self.pub_model = self.pub_model.to("cuda")
+        self.pub_model = self.pub_model.to(self.device)
         self.pub_model.eval()
+        if self.quantize:
+            self.pub_model = self._quantize(self.pub_model)
 
+    def _load_ocr(self):
+        """Charge le modèle d'OCR."""
         # Modèle d'OCR: EasyOCR
-        self.ocr_model = easyocr.Reader(['en'], gpu=True)
+        self.ocr_model = easyocr.Reader(['en'], gpu=self.device if self.device.startswith("cuda") else False)
+
+    def _load_translator(self, language: str):
+        """Charge la police et le modèle de traduction d'une langue."""
+        if language == "ja":
+            self.font_path_ja = "C:\\Users\\herve\\OneDrive - Universite de Montreal\\Github\\Axo\\backend\\fonts\\Source Han Serif CN Light.otf"
+            self.fitter_ja = TextFitter(FontMetrics(self.font_path_ja), self.FONT_SIZE_JAPANESE,
+                                        int(self.FONT_SIZE_JAPANESE * self.MIN_FONT_SCALE), wide_breaks=True)
+            self.translate_model_ja = self._prepare_translator(AutoModelForSeq2SeqLM.from_pretrained(self.TRANSLATION_MODELS["ja"]))
+            self.translate_tokenizer_ja = AutoTokenizer.from_pretrained(self.TRANSLATION_MODELS["ja"])
+            self.word_tokens_ja = LoopBreaker.word_tokens_of(self.translate_tokenizer_ja)
+        else:
+            self.font_path_vi = "C:\\Users\\herve\\OneDrive - Universite de Montreal\\Github\\Axo\\backend\\fonts\\AlegreyaSans-Regular.otf"
+            self.fitter_vi = TextFitter(FontMetrics(self.font_path_vi), self.FONT_SIZE_VIETNAMESE,
+                                        int(self.FONT_SIZE_VIETNAMESE * self.MIN_FONT_SCALE))
+            self.translate_model_vi = self._prepare_translator(AutoModelForSeq2SeqLM.from_pretrained(self.TRANSLATION_MODELS["vi"]))
+            self.translate_tokenizer_vi = AutoTokenizer.from_pretrained(self.TRANSLATION_MODELS["vi"])
+            self.word_tokens_vi = LoopBreaker.word_tokens_of(self.translate_tokenizer_vi)
+
+    def _prepare_translator(self, model):
+        """Place un modèle de traduction sur le périphérique et le quantifie si demandé."""
+        model = model.to(self.device)
+        model.eval()
+        if self.quantize:
+            model = self._quantize(model)
+        return model
+
+    def _quantize(self, model):
+        """Quantification dynamique int8: poids des couches linéaires en int8, activations en float.
+
+        Les convolutions (backbone du détecteur) ne sont pas concernées: seules les
+        couches linéaires de la tête de détection et des traducteurs sont quantifiées.
+        """
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def _crop_box(self, box, rat):
+        """Boîte d'une détection en pixels de la page à DPI, avec une marge autour du texte"""
+        new_box_0 = int(box[0] / rat) - 20
+        new_box_1 = int(box[1] / rat) - 10
+        new_box_2 = int(box[2] / rat) + 20
+        new_box_3 = int(box[3] / rat) + 10
+        return [new_box_0, new_box_1, new_box_2, new_box_3]
+
+    def _ocr_module(self, list_boxes, list_labels_idx, rat, ori_img, render_regions=None):
+        """Module principal qui fait l'OCR sur chaque bloc détecté.
+
+        rat convertit les boîtes détectées en pixels à DPI. Si render_regions est
+        donné, ori_img est ignorée: seules les zones des blocs sont rendues à DPI
+        (voir RegionRenderer). Retourne les blocs de texte (boîte en pixels,
+        texte source) et les titres (haut du titre en pixels, texte du titre).
+        """
+        list_labels = list(map(lambda y: CATEGORIES2LABELS[y.item()], list_labels_idx))
+        list_masks = list(map(lambda x: x == "text", list_labels))
+        text_boxes = [self._crop_box(box, rat) for box in list_boxes[list_masks]]
 
-        # Modèles de traduction
-        self.translate_model_ja = AutoModelForSeq2SeqLM.from_pretrained("Helsinki-NLP/opus-mt-en-jap").to("cuda")
-        self.translate_tokenizer_ja = AutoTokenizer.from_pretrained("Helsinki-NLP/opus-mt-en-jap")
+        # Vérification des titres "Reference" et "Abstract"
+        list_title_masks = list(map(lambda x: x == "title", list_labels))
+        list_title_boxes = list_boxes[list_title_masks]
+        title_boxes = [self._crop_box(box, rat) for box in list_title_boxes]
 
-        self.translate_model_vi = AutoModelForSeq2SeqLM.from_pretrained("VietAI/envit5-translation").to("cuda")
-        self.translate_tokenizer_vi = AutoTokenizer.from_pretrained("VietAI/envit5-translation")
+        BLOCKS_PROCESSED.labels(label="text").inc(len(text_boxes))
+        BLOCKS_PROCESSED.labels(label="title").inc(len(title_boxes))
+        if render_regions is not None and (text_boxes or title_boxes):
+            ori_img = render_regions(text_boxes + title_boxes)
+        list_ocr_results = self._read_blocks(text_boxes + title_boxes, ori_img)
 
-        # Transformation pour le modèle
-        self.transform = transforms.Compose([
-            transforms.ToPILImage(),
-            transforms.ToTensor()
-        ])
+        text_blocks = []
+        for ocr_results, box in zip(list_ocr_results, text_boxes):
+            if ocr_results:
+                text_blocks.append((box, " ".join(ocr_results)))
 
-    def _crop_img(self, box, ori_img):
-        """Découpe une partie d'image selon les coordonnées d'une boîte"""
-        new_box_0 = int(box[0] / self.rat) - 20
-        new_box_1 = int(box[1] / self.rat) - 10
-        new_box_2 = int(box[2] / self.rat) + 20
-        new_box_3 = int(box[3] / self.rat) + 10
-        temp_img = ori_img[new_box_1:new_box_3, new_box_0:new_box_2]
-        box = [new_box_0, new_box_1, new_box_2, new_box_3]
-        return temp_img, box
-
-    def _ocr_module(self, list_boxes, list_labels_idx, ori_img):
-        """Module principal qui fait l'OCR sur chaque bloc et remplace le texte par sa traduction"""
-        original_image = copy.deepcopy(ori_img)
-        list_labels = list(map(lambda y: CATEGORIES2LABELS[y.item()], list_labels_idx))
-        list_masks = list(map(lambda x: x == "text", list_labels))
-        list_boxes_filtered = list_boxes[list_masks]
-        list_images_filtered = [original_image] * len(list_boxes_filtered)
-
-        results = list(map(self._crop_img, list_boxes_filtered, list_images_filtered))
-
-        if len(results) > 0:
-            list_temp_images, list_new_boxes = [row[0] for row in results], [row[1] for row in results]
-
-            list_ocr_results = list(map(lambda x: np.array(x, dtype=object)[:, 1] if len(x) > 0 else None,
-                                        list(map(lambda x: self.ocr_model.readtext(x), list_temp_images))))
-
-            for ocr_results, box in zip(list_ocr_results, list_new_boxes):
-                if ocr_results is not None:
-                    ocr_text = " ".join(ocr_results)
-                    if len(ocr_text) > 1:
-                        text = re.sub(r"\n|\t|\[|\]|\/|\|", " ", ocr_text)
-                        translated_text = self._translate(text)
-                        translated_text = re.sub(r"\n|\t|\[|\]|\/|\|", " ", translated_text)
-
-                        # Si la plupart des caractères ne sont pas japonais, on ignore la traduction
-                        if self.language == "ja":
-                            if len(
-                                    re.findall(
-                                        r"[^\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF]",
-                                        translated_text,
-                                    )
-                            ) > 0.8 * len(translated_text):
-                                print("skipped")
-                                continue
-
-                        # Pour VietAI/envit5-translation, remplacer "vi"
-                        if self.language == "vi":
-                            translated_text = translated_text.replace("vi: ", "")
-                            translated_text = translated_text.replace("vi ", "")
-                            translated_text = translated_text.strip()
-
-                        if self.language == "ja":
-                            if self._repeated_substring(translated_text):  # Vérifier les sous-chaînes répétées
-                                processed_text = fw_fill_ja(
-                                    text,
-                                    width=int(
-                                        (box[2] - box[0]) / (self.FONT_SIZE_JAPANESE / 2)
-                                    )
-                                          + 1,
-                                )
-                            else:
-                                processed_text = fw_fill_ja(
-                                    translated_text,
-                                    width=int(
-                                        (box[2] - box[0]) / (self.FONT_SIZE_JAPANESE / 2)
-                                    )
-                                          + 1,
-                                )
-                        else:
-                            if self._repeated_substring(translated_text):
-                                processed_text = fw_fill_vi(
-                                    text,
-                                    width=int(
-                                        (box[2] - box[0]) / (self.FONT_SIZE_VIETNAMESE / 2)
-                                    )
-                                          + 1,
-                                )
-                            else:
-                                processed_text = fw_fill_vi(
-                                    translated_text,
-                                    width=int(
-                                        (box[2] - box[0]) / (self.FONT_SIZE_VIETNAMESE / 2)
-                                    )
-                                          + 1,
-                                )
-
-                        # Création d'un nouveau bloc pour le texte traduit
-                        new_block = Image.new(
-                            "RGB",
-                            (
-                                box[2] - box[0],
-                                box[3] - box[1],
-                            ),
-                            color=(255, 255, 255),
+        title_blocks = []
+        for result, box in zip(list_ocr_results[len(text_boxes):], list_title_boxes):
+            if result:
+                title_blocks.append((int(box[1] / rat), result[0]))
+
+        return text_blocks, title_blocks
+
+    def _read_blocks(self, boxes, page_img) -> List[List[str]]:
+        """Lit le texte de chaque bloc de la page (RGB ou niveaux de gris): une liste de chaînes par bloc.
+
+        Avec OCR_RECOGNITION_ONLY, les blocs sont découpés en lignes et toute la
+        page passe par le reconnaisseur en un seul lot, sans le détecteur
+        d'EasyOCR; sinon chaque bloc passe par readtext.
+        """
+        if not boxes:
+            return []
+        if not self.OCR_RECOGNITION_ONLY:
+            return [
+                [row[1] for row in self._readtext(page_img[max(y0, 0):y1, max(x0, 0):x1])]
+                for x0, y0, x1, y1 in boxes
+            ]
+        page_gray = page_img if page_img.ndim == 2 else cv2.cvtColor(page_img, cv2.COLOR_RGB2GRAY)
+        with stage_timer("ocr"):
+            return recognize_blocks(self.ocr_model, page_gray, boxes, batch_size=self.OCR_BATCH_SIZE)
+
+    def _text_layer_module(self, blocks):
+        """Sépare les blocs de la couche texte du PDF en blocs à traduire et en titres, sans détection ni OCR.
+
+        Comme la détection ne traduit que les paragraphes, les blocs trop courts
+        (titres, légendes, cellules de tableau) sont conservés tels quels.
+        """
+        text_blocks, title_blocks = [], []
+        for box, text in blocks:
+            if text.strip().lower() in ("references", "reference", "abstract"):
+                title_blocks.append((box[1], text.strip()))
+            elif len(text.split()) >= self.TEXT_LAYER_MIN_WORDS:
+                text_blocks.append((box, text))
+        BLOCKS_PROCESSED.labels(label="text_layer").inc(len(text_blocks))
+        return text_blocks, title_blocks
+
+    def _check_titles(self, title_blocks):
+        """Retourne (références atteintes, haut du titre "Abstract" le plus bas ou None)."""
+        reached_references, abstract_top = False, None
+        for top, title in title_blocks:
+            if title.lower() in ["references", "reference"]:
+                reached_references = True
+            elif title.lower() == "abstract":
+                abstract_top = top if abstract_top is None else max(abstract_top, top)
+        return reached_references, abstract_top
+
+    def _translate_blocks(self, pages_blocks):
+        """Traduit ensemble les blocs (boîte, texte source) de plusieurs pages.
+
+        Retourne, pour chaque page, les blocs (boîte, texte à écrire). Les
+        traductions japonaises sans caractères japonais sont abandonnées et
+        les traductions qui bouclent sont remplacées par le texte source.
+        """
+        sources = [
+            (i, box, re.sub(r"\n|\t|\[|\]|\/|\|", " ", ocr_text))
+            for i, text_blocks in enumerate(pages_blocks)
+            for box, ocr_text in text_blocks
+            if len(ocr_text) > 1
+        ]
+        translations = self._translate_texts([text for _, _, text in sources])
+
+        translated_blocks = [[] for _ in pages_blocks]
+        for (i, box, text), translated_text in zip(sources, translations):
+            translated_text = re.sub(r"\n|\t|\[|\]|\/|\|", " ", translated_text)
+
+            # Si la plupart des caractères ne sont pas japonais, on ignore la traduction
+            if self.language == "ja":
+                if len(
+                        re.findall(
+                            r"[^\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF]",
+                            translated_text,
                         )
-                        draw = ImageDraw.Draw(new_block)
-                        if self.language == "ja":
-                            draw.text(
-                                (0, 0),
-                                text=processed_text,
-                                font=self.font_ja,
-                                fill=(0, 0, 0),
-                            )
-                        else:
-                            draw.text(
-                                (0, 0),
-                                text=processed_text,
-                                font=self.font_vi,
-                                fill=(0, 0, 0),
-                            )
-
-                        new_block = np.array(new_block)
-                        original_image[
-                        int(box[1]): int(box[3]),
-                        int(box[0]): int(box[2]),
-                        ] = new_block
-                else:
+                ) > 0.8 * len(translated_text):
+                    print("skipped")
                     continue
 
-        reached_references = False
-
-        # Vérification des titres "Reference" et "Abstract"
-        list_title_masks = list(map(lambda x: x == "title", list_labels))
-        list_boxes_filtered = list_boxes[list_title_masks]
-        list_images_filtered = [original_image] * len(list_boxes_filtered)
-
-        results = list(map(self._crop_img, list_boxes_filtered, list_images_filtered))
-        if len(results) > 0:
-            list_temp_images = [row[0] for row in results]
-            list_title_ocr_results = list(map(lambda x: np.array(x, dtype=object)[:, 1] if len(x) > 0 else None,
-                                              list(map(lambda x: self.ocr_model.readtext(x), list_temp_images))))
-            if len(list_title_ocr_results) > 0:
-                for i, (result, box) in enumerate(zip(list_title_ocr_results, list_boxes_filtered)):
-                    if result is not None:
-                        if result[0].lower() in ["references", "reference"]:
-                            reached_references = True
-                        elif result[0].lower() == "abstract":
-                            # Conserver le titre et les auteurs originaux
-                            new_box_1 = int(box[1] / self.rat)
-                            original_image[
-                            int(0): int(new_box_1),
-                            int(0): int(original_image.shape[1]),
-                            ] = ori_img[
-                                int(0): int(new_box_1),
-                                int(0): int(ori_img.shape[1]),
-                                ]
-
-        return original_image, reached_references
+            # Pour VietAI/envit5-translation, remplacer "vi"
+            if self.language == "vi":
+                translated_text = translated_text.replace("vi: ", "")
+                translated_text = translated_text.replace("vi ", "")
+                translated_text = translated_text.strip()
+
+            if repeated_substring(translated_text):  # Vérifier les sous-chaînes répétées
+                translated_text = text
+            translated_blocks[i].append((box, translated_text))
+        return translated_blocks
+
+    def _compose_page(self, translated_blocks, abstract_top, ori_img, keep_original: bool = False):
+        """Place les blocs traduits sur la page.
+
+        Retourne (page traduite, original): l'original est ori_img lui-même,
+        sans copie, si keep_original et None sinon. En mode vectoriel, rien
+        n'est dessiné et la page traduite est la liste des blocs (boîte,
+        texte mis en forme, taille de police) à écrire dans la page d'origine.
+        Les blocs au-dessus de abstract_top (titre et auteurs) restent dans
+        la langue source.
+        """
+        vector = self.output_mode == "vector"
+        if abstract_top is not None:
+            # Conserver le titre et les auteurs originaux
+            translated_blocks = [block for block in translated_blocks if block[0][1] >= abstract_top]
+        placed_blocks = []
+        fitter = self.fitter_ja if self.language == "ja" else self.fitter_vi
+        for box, translated_text in translated_blocks:
+            fit_start = time.perf_counter()
+            size, lines = fitter.fit(translated_text, box[2] - box[0], box[3] - box[1])
+            STAGE_SECONDS.labels(stage="fit_text").observe(time.perf_counter() - fit_start)
+            placed_blocks.append((box, "\n".join(lines) if vector else lines, size))
+
+        original = ori_img if keep_original else None
+        if vector:
+            return placed_blocks, original
+        return compose_page(ori_img, placed_blocks, fitter.metrics, fitter.line_spacing), original
+
+    def _readtext(self, image):
+        """Exécute EasyOCR sur une zone découpée."""
+        with stage_timer("ocr"):
+            return self.ocr_model.readtext(image)
 
     def _preprocess_image(self, image):
-        """Prétraitement d'une image pour le modèle Mask R-CNN"""
+        """Prétraitement d'une image pour le modèle Mask R-CNN.
+
+        Retourne [image pour le modèle, image d'origine, ratio de redimensionnement].
+        """
         ori_img = np.array(image)
         img = ori_img[:, :, ::-1].copy()
 
         # Redimensionnement pour maintenir un ratio constant
-        self.rat = 1000 / img.shape[0]
-
-        img = cv2.resize(img, None, fx=self.rat, fy=self.rat)
-        img = self.transform(img).cuda()
-
-        return [img, ori_img]
-
-    def _translate_multiple_pages(
-            self,
-            image_list: List[Image.Image],
-            reached_references: bool,
-    ) -> Tuple[np.ndarray, np.ndarray, bool]:
-        """Traduit une page du PDF."""
-        results = list(map(self._preprocess_image, image_list))
-        new_list_images, list_original_images = [row[0] for row in results], [row[1] for row in results]
-        with torch.no_grad():
-            predictions = self.pub_model(new_list_images)
-
-        list_masks = list(map(lambda x: x["scores"] >= 0.7, predictions))
-        new_list_boxes = list(map(lambda x, y: x['boxes'][y, :], predictions, list_masks))
-        new_list_labels = list(map(lambda x, y: x["labels"][y], predictions, list_masks))
-
-        list_returned_images = []
-        reached_references = False
-        for one_image_boxes, one_image_labels, original_image in zip(new_list_boxes, new_list_labels,
-                                                                     list_original_images):
-            one_translated_image, reached_references = self._ocr_module(one_image_boxes, one_image_labels,
-                                                                        original_image)
-            list_returned_images.append([one_translated_image, original_image])
-            if reached_references:
-                break
-
-        return list_returned_images, reached_references
+        rat = 1000 / img.shape[0]
+
+        img = cv2.resize(img, None, fx=rat, fy=rat)
+        img = self.transform(img).to(self.device)
+
+        return [img, ori_img, rat]
+
+    def _detect_stage(self, pages: List[dict]) -> List[dict]:
+        """Étape de détection: un seul appel au modèle pour les pages scannées du lot.
+
+        Les pages avec couche texte ou déjà analysées traversent l'étape sans détection.
+        """
+        scanned = [page for page in pages if page["text_layer"] is None and page["analysis"] is None]
+        if scanned:
+            self._report("detect", pages=[page["page_number"] for page in scanned])
+            results = list(map(self._preprocess_image, [page["image"] for page in scanned]))
+            with torch.no_grad(), stage_timer("detect"):
+                predictions = self.pub_model([row[0] for row in results])
+
+            for page, (_, ori_img, rat), prediction in zip(scanned, results, predictions):
+                mask = prediction["scores"] >= 0.7
+                page["detection"] = (prediction["boxes"][mask, :], prediction["labels"][mask], rat * page["scale"])
+                page["original"] = ori_img
+        for page in pages:
+            image = page.pop("image")
+            if "original" not in page:
+                page["original"] = np.array(image) if image is not None else None
+        return pages
+
+    def _ocr_stage(self, page: dict, reached_references: set, region_renderers: dict) -> Optional[dict]:
+        """Étape d'OCR (ou de lecture de la couche texte) et de repérage des titres.
+
+        Les pages arrivent dans l'ordre: celles qui suivent les références de
+        leur document sont abandonnées ici.
+        """
+        if page["doc_id"] in reached_references:
+            return None
+        if page["analysis"] is not None:
+            text_blocks, title_blocks = page.pop("analysis")
+        elif page["text_layer"] is None:
+            render_regions = None
+            if page["scale"] != 1.0:
+                # Page détectée en basse résolution: rendre ses blocs à DPI pour l'OCR
+                if page["doc_id"] not in region_renderers:
+                    region_renderers[page["doc_id"]] = RegionRenderer(page["input_path"], self.DPI)
+                renderer = region_renderers[page["doc_id"]]
+                render_regions = lambda boxes: renderer.render(page["page_number"], boxes)
+            text_blocks, title_blocks = self._ocr_module(*page.pop("detection"), page["original"],
+                                                         render_regions=render_regions)
+            if self.analysis_cache is not None:
+                self.analysis_cache.put(page["doc_hash"], page["page_number"], self.analysis_version,
+                                        (text_blocks, title_blocks))
+        else:
+            text_blocks, title_blocks = self._text_layer_module(page["text_layer"])
+        page["text_blocks"] = text_blocks
+        reached, page["abstract_top"] = self._check_titles(title_blocks)
+        if reached:
+            reached_references.add(page["doc_id"])
+        return page
+
+    def _translate_stage(self, pages: List[dict]) -> List[dict]:
+        """Étape de traduction: les segments de toutes les pages du lot sont traduits ensemble."""
+        for page in pages:
+            self._report("translate", page=page["page_number"])
+        translated_blocks = self._translate_blocks([page.pop("text_blocks") for page in pages])
+        for page, blocks in zip(pages, translated_blocks):
+            page["translated_blocks"] = blocks
+        PAGES_PROCESSED.inc(len(pages))
+        return pages
+
+    def _compose_stage(self, page: dict) -> dict:
+        """Étape de mise en page: page traduite (ou blocs placés en mode vectoriel).
+
+        L'original n'est gardé que pour la sortie fusionnée.
+        """
+        page["translated"], page["original"] = self._compose_page(
+            page.pop("translated_blocks"), page["abstract_top"], page.pop("original"), keep_original=self.merge)
+        return page
 
     def _translate(self, text: str) -> str:
         """Traduit le texte en utilisant le modèle de traduction approprié."""
-        texts = self._split_text(text, 450)
-
-        translated_texts = []
-        for i, t in enumerate(texts):
-            http_res = ("http" in t) or ("https" in t)
-            if not http_res:
-                if self.language == "ja":
-                    inputs = self.translate_tokenizer_ja(t, return_tensors="pt").input_ids.to(
-                        "cuda"
-                    )
-                    outputs = self.translate_model_ja.generate(inputs, max_length=512)
-                    res = self.translate_tokenizer_ja.decode(outputs[0], skip_special_tokens=True)
-                else:
-                    inputs = self.translate_tokenizer_vi(t, return_tensors="pt").input_ids.to(
-                        "cuda"
-                    )
-                    outputs = self.translate_model_vi.generate(inputs, max_length=512)
-                    res = self.translate_tokenizer_vi.decode(outputs[0], skip_special_tokens=True)
-            else:
-                res = t
+        return self._translate_texts([text])[0]
 
-            # Ignorer les textes de préface japonais
-            if self.language == "ja" and res.startswith("「この版"):
-                continue
+    def _translate_texts(self, texts: List[str]) -> List[str]:
+        """Traduit plusieurs textes en regroupant leurs segments dans les mêmes appels à generate.
 
-            translated_texts.append(res)
-        return " ".join(translated_texts)
+        Chaque texte est découpé en segments de moins de 450 caractères. Les
+        segments sont triés par longueur pour limiter le padding, traduits par
+        lots de TRANSLATE_BATCH_SIZE, puis rassemblés dans l'ordre de leur texte.
+        Les segments déjà présents dans la mémoire de traduction ne sont pas retraduits;
+        ceux que le LoopBreaker a interrompus restent dans la langue source et
+        ne sont pas mémorisés.
+        """
+        if self.language == "ja":
+            tokenizer, model, word_tokens = self.translate_tokenizer_ja, self.translate_model_ja, self.word_tokens_ja
+        else:
+            tokenizer, model, word_tokens = self.translate_tokenizer_vi, self.translate_model_vi, self.word_tokens_vi
+
+        segments = [self._split_text(text, 450) for text in texts]
+        # Les segments contenant des URL ne sont pas traduits
+        results = [[t if ("http" in t) or ("https" in t) else None for t in text_segments]
+                   for text_segments in segments]
+        # Un segment répété n'est traduit qu'une fois
+        pending = {}
+        for i, text_segments in enumerate(segments):
+            for j, t in enumerate(text_segments):
+                if results[i][j] is None:
+                    pending.setdefault(t, []).append((i, j))
+
+        if self.translation_memory is not None and pending:
+            identity = self._translator_identity()
+            known = self.translation_memory.get_many(list(pending), self.language, identity)
+            for t, res in zip(list(pending), known):
+                if res is not None:
+                    for i, j in pending.pop(t):
+                        results[i][j] = res
+
+        to_translate = sorted(pending, key=len)
+        translated = []
+        for start in range(0, len(to_translate), self.TRANSLATE_BATCH_SIZE):
+            batch = to_translate[start:start + self.TRANSLATE_BATCH_SIZE]
+            inputs = tokenizer(batch, return_tensors="pt", padding=True).to(
+                self.device
+            )
+            loop_breaker = LoopBreaker(tokenizer.eos_token_id, tokenizer.pad_token_id, word_tokens=word_tokens)
+            with stage_timer("translate"):
+                outputs = model.generate(**inputs, max_length=512, logits_processor=LogitsProcessorList([loop_breaker]))
+            LOOPS_STOPPED.inc(loop_breaker.stopped)
+            decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            for t, res, looped in zip(batch, decoded, loop_breaker.looped(outputs)):
+                if looped:
+                    # Traduction tronquée par le LoopBreaker: garder le segment source
+                    res = t
+                else:
+                    translated.append((t, res))
+                for i, j in pending[t]:
+                    results[i][j] = res
+        if self.translation_memory is not None:
+            self.translation_memory.put_many(translated, self.language, self._translator_identity())
+
+        # Ignorer les textes de préface japonais
+        return [
+            " ".join(res for res in text_results if not (self.language == "ja" and res.startswith("「この版")))
+            for text_results in results
+        ]
+
+    def _translator_identity(self) -> str:
+        """Identité du modèle de traduction courant, pour la mémoire de traduction."""
+        return "/".join([
+            self.TRANSLATION_MODELS[self.language],
+            "int8" if self.quantize else "float32",
+            "max_length=512",
+            "loop-breaker/2",
+        ])
 
     def _split_text(self, text: str, text_limit_length: int = 448) -> List[str]:
         """Divise le texte en morceaux ne dépassant pas text_limit_length."""
@@ -460,12 +864,3 @@ class TranslationLayoutRecovery:
         if current_text:
             result.append(current_text)
         return result
-
-    def _merge_pdfs(self, pdf_files: List[str]) -> None:
-        """Fusionne les fichiers PDF traduits en un seul."""
-        result = fitz.open()
-        for pdf_file in sorted(pdf_files):
-            with fitz.open(pdf_file) as f:
-                result.insert_pdf(f)
-                os.remove(pdf_file)
-        result.save(os.path.join("output", "PDFs", "fitz_translated.pdf"))
\ No newline at end of file
@@ -0,0 +1,174 @@
+# Model/pipeline.py
+import heapq
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+# Marque la fin du flux dans les files entre étapes
+_END = object()
+
+
+@dataclass
+class Stage:
+    """Étape du pipeline.
+
+    fn reçoit un lot d'éléments (au plus batch_size) et retourne une liste de
+    même longueur; un élément remplacé par None est abandonné et n'est plus
+    transmis aux étapes suivantes.
+    """
+    name: str
+    fn: Callable[[List[Any]], List[Optional[Any]]]
+    batch_size: int = 1
+    workers: int = 1
+
+
+class Pipeline:
+    """Exécute des étapes chacune dans ses propres threads, reliées par des files bornées.
+
+    Toutes les étapes travaillent en même temps sur des éléments différents:
+    le débit est fixé par l'étape la plus lente, pas par la somme des étapes.
+    Les éléments sont rendus dans l'ordre de la source, même si une étape a
+    plusieurs workers.
+
+    Parameters
+    ----------
+    stages: List[Stage]
+        Étapes, dans l'ordre
+    queue_size: int
+        Nombre maximal d'éléments en attente entre deux étapes; la file d'une
+        étape par lots peut contenir un lot complet
+    max_in_flight: Optional[int]
+        Nombre maximal d'éléments lus dans la source et pas encore rendus,
+        toutes étapes et files confondues; illimité si None
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2, max_in_flight: Optional[int] = None):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        """Fait passer les éléments de source dans toutes les étapes et génère les résultats."""
+        queues = [queue.Queue(maxsize=max(self.queue_size, stage.batch_size)) for stage in self.stages]
+        queues.append(queue.Queue(maxsize=self.queue_size))
+        stop = threading.Event()
+        in_flight = threading.Semaphore(self.max_in_flight) if self.max_in_flight else None
+        errors: List[BaseException] = []
+
+        def put(q: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q: queue.Queue, block: bool = True):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1) if block else q.get_nowait()
+                except queue.Empty:
+                    if not block:
+                        return None
+            return _END
+
+        def fail(e: BaseException) -> None:
+            errors.append(e)
+            stop.set()
+
+        def feed() -> None:
+            items = iter(source)
+            try:
+                seq = 0
+                while True:
+                    # La place est réservée avant de lire (et rendre) l'élément suivant
+                    if in_flight is not None:
+                        while not in_flight.acquire(timeout=0.1):
+                            if stop.is_set():
+                                return
+                    item = next(items, _END)
+                    if item is _END:
+                        break
+                    if not put(queues[0], (seq, item)):
+                        return
+                    seq += 1
+                put(queues[0], _END)
+            except BaseException as e:
+                fail(e)
+            finally:
+                # Arrête le générateur source (et son thread de rendu) en cas d'arrêt anticipé
+                close = getattr(items, "close", None)
+                if close is not None:
+                    close()
+
+        def work(stage: Stage, inbox: queue.Queue, outbox: queue.Queue, finished: List[int],
+                 lock: threading.Lock) -> None:
+            try:
+                ended = False
+                while not ended and not stop.is_set():
+                    first = get(inbox)
+                    if first is _END:
+                        break
+                    batch = [first]
+                    while len(batch) < stage.batch_size:
+                        item = get(inbox, block=False)
+                        if item is None:
+                            break
+                        if item is _END:
+                            ended = True
+                            break
+                        batch.append(item)
+
+                    # Les éléments abandonnés traversent l'étape sans être traités
+                    live = [(seq, item) for seq, item in batch if item is not None]
+                    results = stage.fn([item for _, item in live]) if live else []
+                    processed = dict(zip([seq for seq, _ in live], results))
+                    for seq, item in batch:
+                        if not put(outbox, (seq, processed.get(seq) if item is not None else None)):
+                            return
+                # La fin du flux est repassée aux autres workers; le dernier la transmet
+                put(inbox, _END)
+                with lock:
+                    finished[0] += 1
+                    last = finished[0] == stage.workers
+                if last:
+                    put(outbox, _END)
+            except BaseException as e:
+                fail(e)
+
+        threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            finished, lock = [0], threading.Lock()
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=work,
+                    args=(stage, queues[index], queues[index + 1], finished, lock),
+                    name=f"pipeline-{stage.name}-{worker}",
+                    daemon=True,
+                ))
+        for thread in threads:
+            thread.start()
+
+        # Remise en ordre des éléments selon leur position dans la source
+        pending, next_seq = [], 0
+        try:
+            while True:
+                item = get(queues[-1])
+                if item is _END:
+                    break
+                heapq.heappush(pending, item)
+                while pending and pending[0][0] == next_seq:
+                    _, result = heapq.heappop(pending)
+                    next_seq += 1
+                    if in_flight is not None:
+                        in_flight.release()
+                    if result is not None:
+                        yield result
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
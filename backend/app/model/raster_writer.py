@@ -0,0 +1,87 @@
+# Model/raster_writer.py
+import io
+import os
+from typing import Optional
+
+import fitz
+import numpy as np
+from PIL import Image
+
+
+class RasterWriter:
+    """Écrit les pages traduites, au fil de l'eau, dans un seul PDF ouvert.
+
+    Chaque page est encodée une fois en JPEG (comme le faisait la sortie PDF
+    de PIL) et ajoutée au document, sans fichier intermédiaire par page.
+    Avec flush_every, le document est écrit sur disque toutes les
+    flush_every pages, puis complété par sauvegardes incrémentales.
+
+    Parameters
+    ----------
+    output_file: str
+        PDF de sortie
+    dpi: int
+        Résolution des images de page, convertie en taille de page en points
+    flush_every: int
+        Pages ajoutées entre deux écritures sur disque; 0 pour n'écrire qu'à la fin
+    jpeg_quality: int
+        Qualité JPEG des images de page
+    """
+
+    def __init__(self, output_file: str, dpi: int, flush_every: int = 0, jpeg_quality: int = 75):
+        self.output_file = output_file
+        self.scale = 72 / dpi
+        self.flush_every = flush_every
+        self.jpeg_quality = jpeg_quality
+        self.output = fitz.open()
+        self._pending = 0
+        self._flushed = False
+
+    def add_page(self, image: Image.Image, original: Optional[np.ndarray] = None) -> None:
+        """Ajoute une page; avec original, la page d'origine et la page traduite côte à côte.
+
+        image est la page traduite telle que la retourne compose_page, original
+        la page d'origine en tableau RGB.
+        """
+        images = [image] if original is None else [Image.fromarray(original), image]
+        width = sum(img.width for img in images) * self.scale
+        height = max(img.height for img in images) * self.scale
+        page = self.output.new_page(width=width, height=height)
+        left = 0
+        for img in images:
+            rect = fitz.Rect(left, 0, left + img.width * self.scale, img.height * self.scale)
+            page.insert_image(rect, stream=self._encode(img))
+            left = rect.x1
+
+        self._pending += 1
+        if self.flush_every and self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Écrit sur disque les pages ajoutées depuis la dernière écriture."""
+        if self._flushed:
+            self.output.saveIncr()
+        else:
+            # Une sauvegarde incrémentale suppose un document ouvert depuis son fichier
+            self.output.save(self.output_file, deflate=True)
+            self.output.close()
+            self.output = fitz.open(self.output_file)
+            self._flushed = True
+        self._pending = 0
+
+    def save(self) -> None:
+        if self._flushed:
+            if self._pending:
+                self.output.saveIncr()
+        else:
+            self.output.save(self.output_file, deflate=True)
+        self.close()
+
+    def close(self) -> None:
+        self.output.close()
+
+    def _encode(self, image: Image.Image) -> bytes:
+        # Les pages sont rendues en RGB: encodées sans conversion ni copie
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=self.jpeg_quality)
+        return buffer.getvalue()
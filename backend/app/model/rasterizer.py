@@ -0,0 +1,134 @@
+# Model/rasterizer.py
+import queue
+import threading
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple, Union
+
+import fitz
+import numpy as np
+from PIL import Image
+
+from backend.app.metrics import stage_timer
+from backend.app.model.text_layer import extract_text_blocks
+
+
+def open_document(input_path: Union[Path, str, bytes]) -> fitz.Document:
+    """Ouvre un PDF depuis un chemin ou depuis ses octets."""
+    if isinstance(input_path, bytes):
+        return fitz.open(stream=input_path, filetype="pdf")
+    return fitz.open(input_path)
+
+
+def page_count(input_path: Union[Path, str, bytes]) -> int:
+    with open_document(input_path) as doc:
+        return doc.page_count
+
+
+def render_page(doc: fitz.Document, page_number: int, dpi: int) -> Image.Image:
+    """Rend une page (numérotée à partir de 1) en image RGB."""
+    with stage_timer("rasterize"):
+        pix = doc.load_page(page_number - 1).get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def iter_pages(input_path: Union[Path, str, bytes], pages: Optional[Sequence[int]], dpi: int,
+               prefetch: int = 2, text_layer: bool = False, render_text_pages: bool = True,
+               scan_dpi: Optional[int] = None) -> Iterator[Tuple[int, Optional[Image.Image], Optional[list]]]:
+    """Rend les pages à la demande, avec au plus `prefetch` pages d'avance.
+
+    Le rendu s'exécute dans un thread dédié qui possède le document fitz;
+    la mémoire occupée ne dépend pas du nombre de pages. Fermer le
+    générateur arrête le rendu des pages restantes.
+
+    Yields
+    ------
+    (page_number, image, text_blocks) pour chaque page demandée, dans l'ordre.
+    text_blocks vient de extract_text_blocks si text_layer, sinon None.
+    image est None pour les pages avec couche texte si render_text_pages est False.
+    Si scan_dpi est donné, les pages sans couche texte sont rendues à scan_dpi
+    au lieu de dpi (rendu basse résolution pour la détection).
+    """
+    rendered: "queue.Queue" = queue.Queue(maxsize=max(prefetch, 1))
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                rendered.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            with open_document(input_path) as doc:
+                page_numbers = sorted(set(pages)) if pages is not None else range(1, doc.page_count + 1)
+                for page_number in page_numbers:
+                    text_blocks = extract_text_blocks(doc.load_page(page_number - 1), dpi) if text_layer else None
+                    skip_render = text_blocks is not None and not render_text_pages
+                    page_dpi = scan_dpi if scan_dpi is not None and text_blocks is None else dpi
+                    image = None if skip_render else render_page(doc, page_number, page_dpi)
+                    if not put((page_number, image, text_blocks)):
+                        return
+        except Exception as e:
+            put(e)
+            return
+        put(done)
+
+    producer = threading.Thread(target=produce, name="rasterizer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = rendered.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+class RegionRenderer:
+    """Rend à `dpi` certaines zones des pages d'un document, sans rendre les pages entières.
+
+    Les zones sont rendues en niveaux de gris avec des rectangles de découpe
+    fitz et placées sur une page blanche. Un RegionRenderer possède son propre
+    document fitz et ne doit être utilisé que par un seul thread.
+    """
+
+    def __init__(self, input_path: Union[Path, str, bytes], dpi: int):
+        self.doc = open_document(input_path)
+        self.dpi = dpi
+
+    def render(self, page_number: int, boxes: Sequence[Sequence[int]]) -> np.ndarray:
+        """Page (numérotée à partir de 1) en niveaux de gris où seules les boîtes (pixels à dpi) sont rendues."""
+        page = self.doc.load_page(page_number - 1)
+        scale = self.dpi / 72
+        matrix = fitz.Matrix(scale, scale)
+        # Mêmes dimensions que le rendu de la page entière
+        page_rect = (page.rect * matrix).irect
+        origin_x, origin_y = page_rect.x0, page_rect.y0
+        canvas = np.full((page_rect.height, page_rect.width), 255, dtype=np.uint8)
+        height, width = canvas.shape
+        with stage_timer("rasterize"):
+            for box in boxes:
+                x0, y0 = max(int(box[0]), 0), max(int(box[1]), 0)
+                x1, y1 = min(int(box[2]), width), min(int(box[3]), height)
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                clip = fitz.Rect(x0 + origin_x, y0 + origin_y, x1 + origin_x, y1 + origin_y) * (1 / scale)
+                pix = page.get_pixmap(matrix=matrix, clip=clip, colorspace=fitz.csGRAY, alpha=False)
+                region = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+                # L'origine du pixmap est arrondie vers l'extérieur de la découpe
+                left, top = pix.x - origin_x, pix.y - origin_y
+                rows = slice(max(top, 0), min(top + pix.height, height))
+                columns = slice(max(left, 0), min(left + pix.width, width))
+                canvas[rows, columns] = region[rows.start - top:rows.stop - top, columns.start - left:columns.stop - left]
+        return canvas
+
+    def close(self) -> None:
+        self.doc.close()
@@ -0,0 +1,94 @@
+# Model/repetition_guard.py
+from typing import List, Optional
+
+import torch
+from transformers import LogitsProcessor
+
+
+class LoopBreaker(LogitsProcessor):
+    """Termine pendant la génération les séquences qui bouclent.
+
+    Une séquence boucle quand ses derniers jetons répètent un motif d'au plus
+    max_period jetons, au moins min_repeats fois et sur au moins min_tokens
+    jetons. Le jeton de fin lui est alors imposé: le décodage ne paie plus
+    les centaines de jetons restants jusqu'à max_length. Les séquences ainsi
+    tronquées sont retrouvées après generate par looped, pour que
+    l'appelant les remplace par le texte source.
+
+    Comme pour repeated_substring, un motif dont aucun jeton ne contient de
+    lettre ni de chiffre (points de conduite "▁.", filets "-") reproduit la
+    mise en page de la source et n'est pas une boucle; il faut pour cela
+    fournir word_tokens.
+
+    Parameters
+    ----------
+    eos_token_id: int
+        Jeton de fin imposé aux séquences qui bouclent
+    pad_token_id: int
+        Jeton ajouté aux séquences déjà terminées, qui ne sont pas vérifiées
+    word_tokens: Optional[torch.BoolTensor]
+        Pour chaque jeton du vocabulaire, vrai s'il contient une lettre ou un
+        chiffre (voir word_tokens_of). Sans lui, tout motif compte.
+    """
+
+    def __init__(self, eos_token_id: int, pad_token_id: int, max_period: int = 32, min_repeats: int = 3,
+                 min_tokens: int = 24, word_tokens: Optional[torch.BoolTensor] = None):
+        self.eos_token_id = eos_token_id
+        self.pad_token_id = pad_token_id
+        self.max_period = max_period
+        self.min_repeats = min_repeats
+        self.min_tokens = min_tokens
+        self.word_tokens = word_tokens
+        # Nombre de séquences interrompues
+        self.stopped = 0
+
+    @staticmethod
+    def word_tokens_of(tokenizer) -> torch.BoolTensor:
+        """Jetons du vocabulaire dont le texte contient une lettre ou un chiffre."""
+        texts = tokenizer.batch_decode([[i] for i in range(len(tokenizer))])
+        return torch.tensor([any(c.isalnum() for c in text) for text in texts], dtype=torch.bool)
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        looping = self._looping(input_ids)
+        if looping.any():
+            self.stopped += int(looping.sum())
+            scores[looping] = -float("inf")
+            scores[looping, self.eos_token_id] = 0
+        return scores
+
+    def looped(self, sequences: torch.LongTensor) -> List[bool]:
+        """Pour chaque séquence retournée par generate, vrai si elle finit sur une boucle.
+
+        Le premier jeton (début du décodeur) est ignoré; la séquence est
+        vérifiée telle qu'elle était avant son jeton de fin.
+        """
+        flags = []
+        for row in sequences:
+            ends = (row[1:] == self.eos_token_id).nonzero()
+            end = int(ends[0]) + 1 if len(ends) else len(row)
+            flags.append(bool(self._looping(row[None, :end]).item()))
+        return flags
+
+    def _looping(self, input_ids: torch.LongTensor) -> torch.BoolTensor:
+        """Séquences dont les derniers jetons répètent un motif contenant un mot."""
+        length = input_ids.shape[1]
+        looping = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        for period in range(1, self.max_period + 1):
+            window = max(period * self.min_repeats, self.min_tokens)
+            if window > length:
+                break
+            tail = input_ids[:, -window:]
+            looping |= (tail[:, period:] == tail[:, :-period]).all(dim=1) & self._has_word(tail[:, -period:])
+
+        last = input_ids[:, -1]
+        return looping & (last != self.eos_token_id) & (last != self.pad_token_id)
+
+    def _has_word(self, motif: torch.LongTensor) -> torch.BoolTensor:
+        """Motifs dont au moins un jeton contient une lettre ou un chiffre."""
+        if self.word_tokens is None:
+            return torch.ones(motif.shape[0], dtype=torch.bool, device=motif.device)
+        self.word_tokens = self.word_tokens.to(motif.device)
+        size = len(self.word_tokens)
+        # Jetons du modèle absents du tokenizer: comptés comme des mots
+        words = self.word_tokens[motif.clamp(max=size - 1)] | (motif >= size)
+        return words.any(dim=1)
@@ -0,0 +1,150 @@
+# Model/text_fitting.py
+import re
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import ImageFont
+
+# Caractères larges (CJK, kana, hangul, formes pleine chasse): une coupure est possible entre chacun
+WIDE_CHARS = "\u1100-\u115f\u2e80-\u303f\u3040-\ua4cf\uac00-\ud7a3\uf900-\ufaff\ufe30-\ufe4f\uff00-\uff60\uffe0-\uffe6"
+
+
+class FontMetrics:
+    """Police chargée une fois par taille, avec les avances de ses glyphes en cache.
+
+    Les avances (en pixels) des caractères du plan multilingue de base sont
+    gardées dans un tableau float32 par taille, rempli à la demande; les
+    autres caractères sont mesurés à chaque fois.
+    """
+
+    BMP = 0x10000
+
+    def __init__(self, font_path: str):
+        self.font_path = font_path
+        self._fonts: Dict[int, ImageFont.FreeTypeFont] = {}
+        self._advances: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def font(self, size: int) -> ImageFont.FreeTypeFont:
+        with self._lock:
+            font = self._fonts.get(size)
+            if font is None:
+                font = self._fonts[size] = ImageFont.truetype(self.font_path, size=size)
+            return font
+
+    def line_height(self, size: int) -> int:
+        ascent, descent = self.font(size).getmetrics()
+        return ascent + descent
+
+    def advances(self, text: str, size: int) -> np.ndarray:
+        """Avance en pixels de chaque caractère de text, à la taille size."""
+        with self._lock:
+            table = self._advances.get(size)
+            if table is None:
+                table = self._advances[size] = np.full(self.BMP, np.nan, dtype=np.float32)
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        widths = table[np.minimum(codes, self.BMP - 1)]
+        missing = np.flatnonzero(np.isnan(widths) | (codes >= self.BMP))
+        if len(missing):
+            font = self.font(size)
+            for i in missing:
+                widths[i] = font.getlength(text[i])
+                if codes[i] < self.BMP:
+                    table[codes[i]] = widths[i]
+        return widths
+
+
+class TextFitter:
+    """Choisit la taille de police et les retours à la ligne qui remplissent une boîte.
+
+    Le texte est coupé entre les mots, et entre chaque caractère large si
+    wide_breaks. La largeur d'une ligne est la somme des avances de ses
+    glyphes, lue dans un tableau cumulé: couper un texte ne mesure chaque
+    caractère qu'une fois. La taille est la plus grande de [min_size,
+    max_size] pour laquelle le texte tient en hauteur sans couper de mot,
+    trouvée par dichotomie; un mot plus large que la boîte n'est coupé
+    entre deux caractères qu'à min_size.
+
+    Parameters
+    ----------
+    metrics: FontMetrics
+        Police du texte
+    max_size, min_size: int
+        Bornes de la taille de police, en pixels
+    wide_breaks: bool
+        Autoriser une coupure entre deux caractères larges (japonais)
+    line_spacing: int
+        Espace entre deux lignes, en pixels, comme l'argument spacing de ImageDraw.text
+    """
+
+    def __init__(self, metrics: FontMetrics, max_size: int, min_size: int, wide_breaks: bool = False,
+                 line_spacing: int = 4):
+        self.metrics = metrics
+        self.sizes = list(range(min_size, max_size + 1))
+        self.line_spacing = line_spacing
+        if wide_breaks:
+            self._chunk_re = re.compile(rf"[{WIDE_CHARS}]|[^\s{WIDE_CHARS}]+\s*|\s+")
+        else:
+            self._chunk_re = re.compile(r"\S+\s*|\s+")
+
+    def fit(self, text: str, width: int, height: int) -> Tuple[int, List[str]]:
+        """Retourne (taille de police, lignes). À la taille minimale, le texte peut déborder."""
+        lo, hi = 0, len(self.sizes) - 1
+        best = None
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            lines, broken = self._wrap(text, self.sizes[mid], width)
+            # Une taille qui coupe un mot est trop grande: une plus petite peut l'éviter
+            if not broken and self.text_height(lines, self.sizes[mid]) <= height:
+                best = (self.sizes[mid], lines)
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        if best is None:
+            best = (self.sizes[0], self.wrap(text, self.sizes[0], width))
+        return best
+
+    def text_height(self, lines: List[str], size: int) -> int:
+        if not lines:
+            return 0
+        return len(lines) * self.metrics.line_height(size) + (len(lines) - 1) * self.line_spacing
+
+    def wrap(self, text: str, size: int, width: float) -> List[str]:
+        """Coupe text en lignes d'au plus width pixels à la taille size."""
+        return self._wrap(text, size, width)[0]
+
+    def _wrap(self, text: str, size: int, width: float) -> Tuple[List[str], bool]:
+        """Comme wrap, et indique si un morceau plus large que la boîte a été coupé."""
+        text = " ".join(text.split())
+        if not text:
+            return [], False
+        cumulative = np.concatenate(([0.0], np.cumsum(self.metrics.advances(text, size), dtype=np.float64)))
+        chunks = [(m.start(), m.start() + len(m.group().rstrip())) for m in self._chunk_re.finditer(text)]
+        starts = [start for start, _ in chunks]
+        # Position cumulée de la fin visible (sans les espaces finales) de chaque morceau
+        visible_ends = np.array([end for _, end in chunks])
+        end_positions = cumulative[visible_ends]
+
+        lines = []
+        broken = False
+        i = 0
+        while i < len(chunks):
+            # Une ligne ne commence pas par une espace
+            if visible_ends[i] == starts[i]:
+                i += 1
+                continue
+            line_start = starts[i]
+            limit = cumulative[line_start] + width
+            j = i + int(np.searchsorted(end_positions[i:], limit, side="right"))
+            if j > i:
+                lines.append(text[line_start:visible_ends[j - 1]])
+                i = j
+                continue
+            # Morceau plus large que la boîte: coupure entre deux caractères
+            cut = int(np.searchsorted(cumulative, limit, side="right")) - 1
+            cut = min(max(cut, line_start + 1), visible_ends[i])
+            lines.append(text[line_start:cut])
+            starts[i] = cut
+            broken = True
+        return lines, broken
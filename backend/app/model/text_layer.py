@@ -0,0 +1,45 @@
+# Model/text_layer.py
+from typing import List, Optional, Tuple
+
+import fitz
+
+# Nombre minimal de caractères pour considérer qu'une page a une couche texte
+MIN_TEXT_CHARS = 50
+# Marge (en points) ajoutée autour de chaque bloc pour effacer le texte d'origine
+BLOCK_PADDING = 2
+
+
+def extract_text_blocks(page: fitz.Page, dpi: int) -> Optional[List[Tuple[List[int], str]]]:
+    """Retourne les blocs de texte de la page en coordonnées pixels à `dpi`.
+
+    Retourne None si la page n'a pas de couche texte exploitable (page
+    scannée): elle doit alors passer par la détection et l'OCR.
+    """
+    data = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP)
+    scale = dpi / 72
+    blocks = []
+    n_chars = 0
+    for block in data["blocks"]:
+        if block.get("type") != 0:
+            continue
+        lines = [
+            "".join(span["text"] for span in line["spans"]).strip()
+            for line in block["lines"]
+        ]
+        text = " ".join(line for line in lines if line)
+        if not text:
+            continue
+        n_chars += len(text)
+        x0, y0, x1, y1 = block["bbox"]
+        box = [
+            int((x0 - BLOCK_PADDING) * scale),
+            int((y0 - BLOCK_PADDING) * scale),
+            int((x1 + BLOCK_PADDING) * scale),
+            int((y1 + BLOCK_PADDING) * scale),
+        ]
+        blocks.append((box, text))
+
+    # Une couche texte vide ou quasi vide indique une page scannée
+    if n_chars < MIN_TEXT_CHARS or "�" in "".join(text for _, text in blocks):
+        return None
+    return blocks
@@ -0,0 +1,160 @@
+# Model/translation_memory.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from backend.app.metrics import CACHE_REQUESTS
+
+
+def normalize(text: str) -> str:
+    """Forme normalisée d'un segment: espaces multiples et retours à la ligne réduits."""
+    return " ".join(text.split())
+
+
+class TranslationMemory:
+    """Mémoire de traduction par segment: un LRU en mémoire devant une base SQLite.
+
+    Les entrées sont indexées par le segment source normalisé, la langue
+    cible et l'identité du modèle de traduction; changer de modèle ou de
+    quantification ne réutilise donc jamais d'anciennes traductions. La base
+    garde au plus `max_entries` segments, les moins récemment utilisés étant
+    supprimés en premier.
+
+    Parameters
+    ----------
+    path: Union[Path, str]
+        Fichier SQLite, partagé par tous les processus qui traduisent
+    max_entries: int
+        Nombre maximal de segments dans la base
+    lru_size: int
+        Nombre de segments gardés en mémoire
+    """
+
+    # Suppression par paquets, pour ne pas compter les entrées à chaque écriture
+    EVICT_EVERY = 1000
+
+    def __init__(self, path: Union[Path, str], max_entries: int = 500_000, lru_size: int = 10_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used)")
+
+    @staticmethod
+    def key(text: str, language: str, model: str) -> str:
+        raw = "|".join([language, model, normalize(text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: Sequence[str], language: str, model: str) -> List[Optional[str]]:
+        """Retourne la traduction connue de chaque segment, ou None."""
+        keys = [self.key(text, language, model) for text in texts]
+        results: List[Optional[str]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+        # Segments servis, y compris depuis le LRU: _evict s'appuie sur last_used
+        used = set()
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    results[i] = self._lru[key]
+                    used.add(key)
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing:
+                found = self._select(list(missing))
+                used.update(found)
+                for key, translation in found.items():
+                    self._remember(key, translation)
+                    for i in missing[key]:
+                        results[i] = translation
+
+            if used:
+                now = time.time()
+                with self._db:
+                    self._db.executemany("UPDATE segments SET last_used = ? WHERE key = ?",
+                                         [(now, key) for key in used])
+
+            hits = sum(result is not None for result in results)
+            self.hits += hits
+            self.misses += len(results) - hits
+        CACHE_REQUESTS.labels(cache="translation_memory", result="hit").inc(hits)
+        CACHE_REQUESTS.labels(cache="translation_memory", result="miss").inc(len(results) - hits)
+        return results
+
+    def put_many(self, items: Sequence[Tuple[str, str]], language: str, model: str) -> None:
+        """Enregistre des paires (segment source, traduction)."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(self.key(text, language, model), translation, now) for text, translation in items]
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO segments VALUES (?, ?, ?)", rows)
+            for key, translation, _ in rows:
+                self._remember(key, translation)
+            self._writes += len(rows)
+            if self._writes >= self.EVICT_EVERY:
+                self._writes = 0
+                self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            entries = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": entries,
+                "bytes": os.path.getsize(self.path) if self.path.exists() else 0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _select(self, keys: List[str]) -> Dict[str, str]:
+        found = {}
+        # SQLite limite le nombre de paramètres d'une requête
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(self._db.execute(
+                f"SELECT key, translation FROM segments WHERE key IN ({placeholders})", chunk
+            ).fetchall())
+        return found
+
+    def _remember(self, key: str, translation: str) -> None:
+        self._lru[key] = translation
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Supprime les segments les moins récemment utilisés au-delà de max_entries."""
+        count = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        with self._db:
+            self._db.execute(
+                "DELETE FROM segments WHERE key IN (SELECT key FROM segments ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
@@ -0,0 +1,84 @@
+# Model/vector_writer.py
+from pathlib import Path
+from typing import List, Sequence, Union
+
+import fitz
+
+from backend.app.model.rasterizer import open_document
+
+
+class VectorWriter:
+    """Construit le PDF traduit à partir des pages d'origine, sans les rasteriser.
+
+    Chaque bloc traduit est effacé par une rédaction (le texte d'origine est
+    retiré, les images sont conservées) puis réécrit avec insert_textbox.
+    Le texte reste sélectionnable. La police est réduite aux glyphes
+    utilisés à l'enregistrement: la taille du fichier reste proche de celle
+    du PDF source, même avec une police CJK de plusieurs dizaines de Mo.
+
+    Parameters
+    ----------
+    input_path: Union[Path, str, bytes]
+        PDF source
+    dpi: int
+        Résolution des coordonnées des blocs (pixels), convertie en points
+    font_file: str
+        Police utilisée pour le texte traduit
+    font_size: float
+        Taille de police en pixels à `dpi`
+    """
+
+    # Réductions successives de la taille de police si le texte déborde du bloc
+    SHRINK_STEPS = (1.0, 0.9, 0.8, 0.7)
+
+    def __init__(self, input_path: Union[Path, str, bytes], dpi: int, font_file: str, font_size: float):
+        self.source = open_document(input_path)
+        self.output = fitz.open()
+        self.scale = 72 / dpi
+        self.font_file = font_file
+        self.font_name = "axo-" + Path(font_file).stem.replace(" ", "-")
+        self.font_size = font_size * self.scale
+
+    def add_page(self, page_number: int, blocks: List[Sequence]) -> None:
+        """Copie la page source (numérotée à partir de 1) et y remplace les blocs traduits.
+
+        Chaque bloc est (boîte, texte) ou (boîte, texte, taille de police en
+        pixels à `dpi`); sans taille, font_size est utilisée.
+        """
+        self.output.insert_pdf(self.source, from_page=page_number - 1, to_page=page_number - 1)
+        page = self.output[-1]
+        rects = [fitz.Rect([coordinate * self.scale for coordinate in block[0]]) for block in blocks]
+        for rect in rects:
+            page.add_redact_annot(rect, fill=(1, 1, 1))
+        if rects:
+            page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+
+        for rect, block in zip(rects, blocks):
+            text = block[1]
+            font_size = block[2] * self.scale if len(block) > 2 else self.font_size
+            for step in self.SHRINK_STEPS:
+                if self._insert(page, rect, text, font_size * step):
+                    break
+            else:
+                # Même à la plus petite taille, le texte déborde: n'écrire que les lignes
+                # qui tiennent dans le bloc, sans recouvrir le contenu voisin
+                lines = text.split("\n")
+                while len(lines) > 1:
+                    lines.pop()
+                    if self._insert(page, rect, "\n".join(lines), font_size * self.SHRINK_STEPS[-1]):
+                        break
+
+    def _insert(self, page: fitz.Page, rect: fitz.Rect, text: str, font_size: float) -> bool:
+        # insert_textbox n'écrit rien et retourne une valeur négative si le texte déborde
+        return page.insert_textbox(rect, text, fontsize=font_size,
+                                   fontname=self.font_name, fontfile=self.font_file) >= 0
+
+    def save(self, output_file: str) -> None:
+        # La police est embarquée entière par insert_textbox: ne garder que les glyphes utilisés
+        self.output.subset_fonts()
+        self.output.save(output_file, garbage=3, deflate=True)
+        self.close()
+
+    def close(self) -> None:
+        self.output.close()
+        self.source.close()
@@ -0,0 +1,98 @@
+# backend/app/tasks.py
+"""Tâches de traduction exécutées par un JobManager.
+
+Elles tournent là où vivent les tâches: dans le worker HTTP quand il charge
+les modèles, ou dans le serveur d'inférence (backend/app/inference.py),
+que les workers HTTP interrogent. `model` est un TranslationLayoutRecovery
+ou tout objet exposant translate_pdf et translate_pdfs.
+"""
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from backend.app.cache import ResultCache
+from backend.app.jobs import Job
+
+
+def translation_result(file_path: Path, pages: List[int], cached: bool) -> dict:
+    """Réponse retournée pour une traduction terminée"""
+    return {
+        "success": True,
+        "message": "Traduction terminée avec succès",
+        "file_path": file_path.as_posix(),
+        "page_number": pages[0],
+        "pages": pages,
+        "cached": cached
+    }
+
+
+def translation_tasks(model: Any, result_cache: ResultCache) -> Dict[str, Callable[..., dict]]:
+    """Tâches nommées à passer à JobManager: "translate" et "translate_batch"."""
+
+    def run_translation(job: Job, temp_file_path: str, language: str, pages: List[int], cache_key: str,
+                        output_mode: str) -> dict:
+        """Exécute une traduction dans un worker et nettoie le fichier temporaire"""
+        cache_temp_path = result_cache.temp_path_for(cache_key)
+        try:
+            model.translate_pdf(
+                input_path=temp_file_path,
+                language=language,
+                merge=False,
+                pages=pages,
+                output_file=str(cache_temp_path),
+                progress=job.report,
+                output_mode=output_mode
+            )
+            return translation_result(result_cache.put(cache_key, cache_temp_path), pages, cached=False)
+        finally:
+            if cache_temp_path.exists():
+                cache_temp_path.unlink()
+            # Nettoyer le fichier temporaire
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+
+    def run_batch_translation(job: Job, documents: List[dict], language: str, cached: List[dict],
+                              output_mode: str) -> dict:
+        """Traduit un lot de documents en une seule passe du pipeline et retourne le manifeste"""
+        # Un même document peut apparaître plusieurs fois dans le lot: le traduire une fois
+        to_translate = {}
+        for document in documents:
+            to_translate.setdefault(document["cache_key"], document)
+        cache_temp_paths = {key: result_cache.temp_path_for(key) for key in to_translate}
+        try:
+            model.translate_pdfs(
+                documents=[{
+                    "input_path": document["path"],
+                    "pages": document["pages"],
+                    "output_file": str(cache_temp_paths[key])
+                } for key, document in to_translate.items()],
+                language=language,
+                merge=False,
+                progress=job.report,
+                output_mode=output_mode
+            )
+            output_paths = {key: result_cache.put(key, path) for key, path in cache_temp_paths.items()}
+            manifest = cached + [
+                {
+                    "index": document["index"],
+                    "name": document["name"],
+                    "file_path": output_paths[document["cache_key"]].as_posix(),
+                    "pages": document["pages"],
+                    "cached": False
+                }
+                for document in documents
+            ]
+            return {
+                "success": True,
+                "message": "Traduction terminée avec succès",
+                "documents": sorted(manifest, key=lambda entry: entry["index"])
+            }
+        finally:
+            for path in cache_temp_paths.values():
+                if path.exists():
+                    path.unlink()
+            for document in documents:
+                if os.path.exists(document["path"]):
+                    os.unlink(document["path"])
+
+    return {"translate": run_translation, "translate_batch": run_batch_translation}
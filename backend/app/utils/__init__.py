@@ -1,5 +1,7 @@
 # Model/utils/__init__.py
 from .textwrap_japanese import fw_fill_ja, fw_wrap_ja
 from .textwrap_vietnamese import fw_fill_vi, fw_wrap_vi
+from .pages import parse_page_selection
+from .repetition import repeated_substring
 
-__all__ = ["fw_fill_ja", "fw_wrap_ja", "fw_fill_vi", "fw_wrap_vi"]
\ No newline at end of file
+__all__ = ["fw_fill_ja", "fw_wrap_ja", "fw_fill_vi", "fw_wrap_vi", "parse_page_selection", "repeated_substring"]
@@ -0,0 +1,30 @@
+# Model/utils/pages.py
+from typing import List, Optional
+
+
+def parse_page_selection(spec: Optional[str], page_count: int) -> List[int]:
+    """Convertit une sélection de pages en liste triée de numéros (à partir de 1).
+
+    Accepte "all", un numéro ("3"), une plage ("2-5") ou une liste des deux
+    ("1-3,7,9-10"). Lève ValueError si la sélection est invalide ou hors du document.
+    """
+    if spec is None or spec.strip().lower() in ("", "all"):
+        return list(range(1, page_count + 1))
+
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            first, last = int(first), int(last)
+        else:
+            first = last = int(part)
+        if first < 1 or last > page_count or first > last:
+            raise ValueError(f"invalid page range {part!r} for a document of {page_count} pages")
+        pages.update(range(first, last + 1))
+    if not pages:
+        raise ValueError("empty page selection")
+    return sorted(pages)
+
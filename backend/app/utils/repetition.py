@@ -0,0 +1,40 @@
+# Model/utils/repetition.py
+import numpy as np
+
+# Une boucle est une suite d'au moins MIN_REPEATS copies consécutives d'un même motif
+MIN_REPEATS = 3
+# ... couvrant au moins MIN_LENGTH caractères
+MIN_LENGTH = 40
+# Longueurs minimale et maximale du motif répété (caractères): une suite d'un
+# même caractère est un filet ou des points de conduite, pas une boucle
+MIN_PERIOD = 2
+MAX_PERIOD = 200
+
+
+def repeated_substring(text: str, min_repeats: int = MIN_REPEATS, min_length: int = MIN_LENGTH,
+                       min_period: int = MIN_PERIOD, max_period: int = MAX_PERIOD) -> bool:
+    """Détecte une traduction qui boucle: un motif répété au moins min_repeats fois à la suite.
+
+    Pour chaque période p, les caractères sont comparés à ceux situés p
+    positions plus loin; une suite de comparaisons égales de longueur L
+    correspond à L + p caractères de période p. Le coût est linéaire en la
+    longueur du texte pour chaque période, soit O(n * max_period).
+
+    Un motif sans lettre ni chiffre (points de conduite ". . .", filets
+    "- - -", bordures de tableau) reproduit la mise en page de la source et
+    n'est pas compté comme une boucle.
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    n = len(codes)
+    if n < min_length:
+        return False
+    for period in range(min_period, min(max_period, n // min_repeats) + 1):
+        equal = codes[period:] == codes[:-period]
+        # Suites de True assez longues
+        edges = np.diff(np.concatenate(([0], equal.view(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        long_runs = ends - starts + period >= max(min_repeats * period, min_length)
+        for start in starts[long_runs]:
+            if any(c.isalnum() for c in text[start:start + period]):
+                return True
+    return False
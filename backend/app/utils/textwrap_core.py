@@ -0,0 +1,179 @@
+# Model/utils/textwrap_core.py
+import sys
+import textwrap
+import unicodedata
+from bisect import bisect_right
+from itertools import accumulate, groupby
+from typing import Callable, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+MAXWIDTH = 70
+
+# Points de code évalués par char_width: plans 0 à 3 (dont les idéogrammes CJK étendus)
+TABLE_SIZE = 0x40000
+# Longueur à partir de laquelle la largeur d'un texte est sommée par numpy
+VECTOR_MIN_LENGTH = 128
+# Nombre maximal de caractères de largeur différente de 1 gardés dans un ensemble
+# (quelques centaines pour les écritures latines, toute la plage CJK en japonais)
+IRREGULAR_SET_MAX = 0x10000
+
+
+class WidthTable:
+    """Largeur en colonnes de chaque point de code, précalculée une fois par langue.
+
+    char_width donne la largeur d'un caractère; elle est évaluée pour tous
+    les points de code de TABLE_SIZE au premier usage (~0,2 s par table et
+    par processus). La table est complétée par des largeurs de 1 jusqu'au
+    dernier point de code pour être indexée sans test de bornes. La largeur
+    d'un texte court est la somme des largeurs lues dans la table, ou sa
+    longueur s'il ne contient aucun caractère de largeur différente de 1
+    (le cas courant en vietnamien); celle d'un texte long est calculée par
+    numpy sur son encodage UTF-32.
+    """
+
+    def __init__(self, char_width: Callable[[str], int]):
+        self._char_width = char_width
+        self._table: Optional[bytearray] = None
+        self._widths: Optional[np.ndarray] = None
+        self._irregular: Optional[FrozenSet[str]] = None
+
+    @property
+    def table(self) -> bytearray:
+        if self._table is None:
+            self._build()
+        return self._table
+
+    def _build(self) -> None:
+        table = bytearray(self._char_width(chr(code)) for code in range(TABLE_SIZE))
+        table.extend(b"\x01" * (sys.maxunicode + 1 - TABLE_SIZE))
+        self._widths = np.frombuffer(table, dtype=np.uint8)
+        irregular = np.flatnonzero(self._widths[:TABLE_SIZE] != 1)
+        if len(irregular) <= IRREGULAR_SET_MAX:
+            self._irregular = frozenset(map(chr, irregular.tolist()))
+        self._table = table
+
+    def char_width(self, c: str) -> int:
+        return self.table[ord(c)]
+
+    def column_width(self, text: str) -> int:
+        """Largeur en colonnes de text."""
+        if text.isascii():
+            return len(text)
+        table = self.table
+        if len(text) < VECTOR_MIN_LENGTH:
+            if self._irregular is not None and self._irregular.isdisjoint(text):
+                return len(text)
+            return sum(map(table.__getitem__, map(ord, text)))
+        codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        return int(self._widths[codes].sum())
+
+    def cumulative_widths(self, text: str) -> List[int]:
+        """Largeur cumulée de text après chaque caractère."""
+        return list(accumulate(map(self.table.__getitem__, map(ord, text))))
+
+
+def _japanese_width(c: str) -> int:
+    width = 2 if unicodedata.east_asian_width(c) in ("W", "F") else 1
+    return width - 1 if unicodedata.combining(c) else width
+
+
+def _latin_width(c: str) -> int:
+    return 0 if unicodedata.combining(c) else 1
+
+
+# Pleine chasse et caractères larges sur deux colonnes, une colonne de moins pour les combinants
+JAPANESE_WIDTHS = WidthTable(_japanese_width)
+# Une colonne par caractère, zéro pour les combinants
+LATIN_WIDTHS = WidthTable(_latin_width)
+
+
+class ColumnWrapper(textwrap.TextWrapper):
+    """TextWrapper qui mesure les lignes en colonnes d'affichage avec une WidthTable.
+
+    Les suites de caractères larges sont découpées caractère par caractère,
+    les autres par mots comme dans textwrap.
+    """
+
+    def __init__(self, widths: WidthTable, **kwargs):
+        super().__init__(**kwargs)
+        self.widths = widths
+
+    def _wrap_chunks(self, chunks: List[str]) -> List[str]:
+        """Comme textwrap.TextWrapper._wrap_chunks, avec la largeur en colonnes au lieu de len()."""
+        lines = []
+        if self.width <= 0:
+            raise ValueError("invalid width %r (must be > 0)" % self.width)
+
+        column_width = self.widths.column_width
+        chunks.reverse()
+
+        while chunks:
+            cur_line = []
+            cur_len = 0
+
+            indent = self.subsequent_indent if lines else self.initial_indent
+            width = self.width - column_width(indent)
+
+            if self.drop_whitespace and chunks[-1].strip() == "" and lines:
+                del chunks[-1]
+
+            while chunks:
+                length = column_width(chunks[-1])
+                if cur_len + length <= width:
+                    cur_line.append(chunks.pop())
+                    cur_len += length
+                else:
+                    break
+
+            if chunks and column_width(chunks[-1]) > width:
+                self._handle_long_word(chunks, cur_line, cur_len, width)
+
+            if self.drop_whitespace and cur_line and cur_line[-1].strip() == "":
+                del cur_line[-1]
+
+            if cur_line:
+                lines.append(indent + "".join(cur_line))
+
+        return lines
+
+    def _break_word(self, word: str, space_left: int) -> Tuple[str, str]:
+        """Coupe word avant le caractère qui dépasse space_left colonnes.
+
+        La coupure se fait un caractère avant, comme dans les anciens wrappers.
+        """
+        i = bisect_right(self.widths.cumulative_widths(word), space_left)
+        if i == len(word):
+            return word, ""
+        return word[: i - 1], word[i - 1:]
+
+    def _split(self, text: str) -> List[str]:
+        """Découpe en mots, puis les suites de caractères larges en caractères isolés."""
+        split = lambda t: textwrap.TextWrapper._split(self, t)
+        chunks = []
+        for chunk in split(text):
+            for w, g in groupby(chunk, self.widths.char_width):
+                if w == 1:
+                    chunks.extend(split("".join(g)))
+                else:
+                    chunks.extend(list(g))
+        return chunks
+
+    def _handle_long_word(self, reversed_chunks: List[str], cur_line: List[str], cur_len: int, width: int) -> None:
+        """Comme textwrap, avec _break_word au lieu d'une coupure par len()."""
+        space_left = max(width - cur_len, 1)
+        if self.break_long_words:
+            l, r = self._break_word(reversed_chunks[-1], space_left)
+            cur_line.append(l)
+            reversed_chunks[-1] = r
+
+        elif not cur_line:
+            cur_line.append(reversed_chunks.pop())
+
+
+def wrap(text: str, widths: WidthTable, width: int = MAXWIDTH, **kwargs) -> List[str]:
+    return ColumnWrapper(widths, width=width, **kwargs).wrap(text)
+
+
+def fill(text: str, widths: WidthTable, width: int = MAXWIDTH, **kwargs) -> str:
+    return "\n".join(wrap(text, widths, width=width, **kwargs))
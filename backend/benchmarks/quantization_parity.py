@@ -0,0 +1,113 @@
+# benchmarks/quantization_parity.py
+"""Compare les modèles float32 et quantifiés int8 sur CPU.
+
+    python -m backend.benchmarks.quantization_parity article.pdf --language ja --pages 3
+
+Mesure, sur les premières pages du PDF:
+    - détection: part des boîtes float32 retrouvées en int8 (IoU >= 0.5, même label)
+    - traduction: part des blocs traduits à l'identique et similarité moyenne
+    - temps de chaque variante
+
+Le script se termine en erreur (code 1) si la part de boîtes retrouvées
+est sous --min-box-recall ou la similarité moyenne sous --min-similarity.
+"""
+import argparse
+import difflib
+import sys
+import time
+
+import fitz
+import torch
+from torchvision.ops import box_iou
+
+from backend.app.model.main import TranslationLayoutRecovery
+from backend.app.model.rasterizer import render_page
+from backend.app.model.text_layer import extract_text_blocks
+
+
+def detect(model: TranslationLayoutRecovery, images):
+    model._ensure_loaded("detector")
+    inputs = [model._preprocess_image(image)[0] for image in images]
+    start = time.perf_counter()
+    with torch.no_grad():
+        predictions = model.pub_model(inputs)
+    elapsed = time.perf_counter() - start
+    return [
+        (prediction["boxes"][prediction["scores"] >= 0.7], prediction["labels"][prediction["scores"] >= 0.7])
+        for prediction in predictions
+    ], elapsed
+
+
+def translate(model: TranslationLayoutRecovery, language: str, texts):
+    model._ensure_models(language)
+    model.language = language
+    start = time.perf_counter()
+    translations = model._translate_texts(texts)
+    return translations, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf")
+    parser.add_argument("--language", default="ja", choices=["ja", "vi"])
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--min-box-recall", type=float, default=0.95,
+                        help="Part minimale des boîtes float32 retrouvées en int8")
+    parser.add_argument("--min-similarity", type=float, default=0.9,
+                        help="Similarité moyenne minimale des traductions int8 et float32")
+    args = parser.parse_args()
+    failures = []
+
+    dpi = TranslationLayoutRecovery.DPI
+    with fitz.open(args.pdf) as doc:
+        page_numbers = range(1, min(args.pages, doc.page_count) + 1)
+        images = [render_page(doc, n, dpi) for n in page_numbers]
+        texts = [
+            text
+            for n in page_numbers
+            for _, text in (extract_text_blocks(doc.load_page(n - 1), dpi) or [])
+            if len(text.split()) >= TranslationLayoutRecovery.TEXT_LAYER_MIN_WORDS
+        ]
+
+    reference = TranslationLayoutRecovery(lazy=True, device="cpu", quantize=False)
+    quantized = TranslationLayoutRecovery(lazy=True, device="cpu", quantize=True)
+    # Les deux variantes doivent réellement traduire chaque segment
+    reference.translation_memory = quantized.translation_memory = None
+
+    ref_detections, ref_seconds = detect(reference, images)
+    q_detections, q_seconds = detect(quantized, images)
+    found = total = 0
+    for (ref_boxes, ref_labels), (q_boxes, q_labels) in zip(ref_detections, q_detections):
+        total += len(ref_boxes)
+        if len(ref_boxes) and len(q_boxes):
+            iou = box_iou(ref_boxes, q_boxes)
+            same_label = ref_labels[:, None] == q_labels[None, :]
+            found += int(((iou >= 0.5) & same_label).any(dim=1).sum())
+    print(f"detection: {found}/{total} boxes recovered, "
+          f"float32 {ref_seconds:.2f}s, int8 {q_seconds:.2f}s")
+    recall = found / total if total else 1.0
+    if recall < args.min_box_recall:
+        failures.append(f"box recall {recall:.3f} < {args.min_box_recall}")
+
+    if not texts:
+        print("translation: no text layer in the selected pages")
+    else:
+        ref_translations, ref_seconds = translate(reference, args.language, texts)
+        q_translations, q_seconds = translate(quantized, args.language, texts)
+        identical = sum(a == b for a, b in zip(ref_translations, q_translations))
+        similarity = sum(
+            difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(ref_translations, q_translations)
+        ) / len(texts)
+        print(f"translation: {identical}/{len(texts)} identical, mean similarity {similarity:.3f}, "
+              f"float32 {ref_seconds:.2f}s, int8 {q_seconds:.2f}s")
+        if similarity < args.min_similarity:
+            failures.append(f"translation similarity {similarity:.3f} < {args.min_similarity}")
+
+    if failures:
+        print("parity FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("parity OK")
+
+
+if __name__ == "__main__":
+    main()
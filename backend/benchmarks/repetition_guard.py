@@ -0,0 +1,110 @@
+# benchmarks/repetition_guard.py
+"""Mesure le gain de LoopBreaker et de repeated_substring.
+
+    python -m backend.benchmarks.repetition_guard --language ja
+
+1. Détection a posteriori: ancienne recherche par expressions régulières
+   contre repeated_substring, sur des traductions qui bouclent; les points
+   de conduite et filets recopiés de la source ne doivent pas être signalés.
+2. Décodage: durée et nombre de jetons générés avec et sans LoopBreaker,
+   sur des entrées connues pour faire boucler les traducteurs.
+"""
+import argparse
+import re
+import time
+
+import torch
+from transformers import LogitsProcessorList
+
+from backend.app.model.main import TranslationLayoutRecovery
+from backend.app.model.repetition_guard import LoopBreaker
+from backend.app.utils.repetition import repeated_substring
+
+# Entrées qui font boucler les traducteurs: listes de références, points de conduite, tableaux
+LOOP_PRONE_INPUTS = [
+    " ".join(f"[{i}]" for i in range(1, 80)),
+    "Introduction " + ". " * 120 + " 1",
+    " ".join(["0.1"] * 150),
+    "Table 1: " + " | ".join(["n/a"] * 100),
+]
+
+# Traductions correctes qui reproduisent la mise en page de la source
+LAYOUT_FILLERS = [
+    "Introduction " + ". " * 40 + "1",
+    "Related work " + "." * 60 + " 4",
+    "-" * 72,
+    "Table 2 " + "- " * 30 + "n = 120",
+    "+" + "-------+" * 8,
+]
+
+
+def legacy_repeated_substring(s: str) -> bool:
+    """Ancienne détection, appelée après chaque génération avant ce changement."""
+    n = len(s)
+    for i in range(10, n // 2 + 1):
+        pattern = s[:i]
+        matches = [match for match in re.finditer(rf'\b{re.escape(pattern)}\b', s)]
+        if len(matches) >= 15:
+            return True
+    for i in range(n // 2 + 11, n):
+        pattern = s[n // 2 + 1:i]
+        matches = [match for match in re.finditer(rf'\b{re.escape(pattern)}\b', s)]
+        if len(matches) >= 15:
+            return True
+    return False
+
+
+def bench_detection() -> None:
+    for length in (250, 500, 1000, 2000):
+        looped = ("Cette phrase est traduite. " + "la la la boucle " * length)[:length]
+        clean = " ".join(f"mot{i}" for i in range(length))[:length]
+        for name, text in (("looped", looped), ("clean", clean)):
+            start = time.perf_counter()
+            legacy = legacy_repeated_substring(text)
+            legacy_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            found = repeated_substring(text)
+            seconds = time.perf_counter() - start
+            print(f"detection {name:6} {length:5} chars: regex {legacy_seconds * 1000:9.2f} ms ({legacy}), "
+                  f"linear {seconds * 1000:6.2f} ms ({found})")
+
+    for text in LAYOUT_FILLERS:
+        assert not repeated_substring(text), f"layout filler flagged as a loop: {text[:40]!r}"
+    print(f"detection fillers: {len(LAYOUT_FILLERS)} leaders and rules accepted")
+
+
+def bench_decoding(language: str) -> None:
+    model = TranslationLayoutRecovery(lazy=True)
+    model._ensure_models(language)
+    if language == "ja":
+        tokenizer, translator, word_tokens = model.translate_tokenizer_ja, model.translate_model_ja, model.word_tokens_ja
+    else:
+        tokenizer, translator, word_tokens = model.translate_tokenizer_vi, model.translate_model_vi, model.word_tokens_vi
+
+    for text in LOOP_PRONE_INPUTS:
+        inputs = tokenizer([text], return_tensors="pt", padding=True).to(model.device)
+        for guarded in (False, True):
+            processors = LogitsProcessorList()
+            if guarded:
+                processors.append(LoopBreaker(tokenizer.eos_token_id, tokenizer.pad_token_id, word_tokens=word_tokens))
+            start = time.perf_counter()
+            with torch.no_grad():
+                outputs = translator.generate(**inputs, max_length=512, logits_processor=processors)
+            seconds = time.perf_counter() - start
+            print(f"decoding {'guarded' if guarded else 'plain':7} {outputs.shape[1]:4} tokens "
+                  f"{seconds:6.2f} s  {text[:40]!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--language", default="ja", choices=["ja", "vi"])
+    parser.add_argument("--skip-decoding", action="store_true", help="only benchmark the post-hoc detection")
+    args = parser.parse_args()
+
+    bench_detection()
+    if not args.skip_decoding:
+        bench_decoding(args.language)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/textwrap_bench.py
+"""Mesure le gain des tables de largeur partagées par les wrappers japonais et vietnamien.
+
+    python -m backend.benchmarks.textwrap_bench --repeat 20
+
+Les anciennes largeurs, recalculées avec unicodedata à chaque appel, sont
+comparées aux WidthTable de textwrap_core sur column_width (texte entier
+et mot par mot) et fill; les sorties des deux versions doivent être
+identiques.
+"""
+import argparse
+import time
+import unicodedata
+
+from backend.app.utils.textwrap_core import JAPANESE_WIDTHS, LATIN_WIDTHS, ColumnWrapper, WidthTable
+from backend.app.utils.textwrap_japanese import fw_fill_ja
+from backend.app.utils.textwrap_vietnamese import fw_fill_vi
+
+SAMPLES = {
+    "ja": "深層学習に基づく文書レイアウト解析は、スキャンされた論文の翻訳において重要な役割を果たす。"
+          "本研究では PubLayNet で学習した検出器を用い、テキストブロックを抽出した後に OCR を適用する。 ",
+    "vi": "Phân tích bố cục tài liệu dựa trên học sâu đóng vai trò quan trọng trong việc dịch các bài báo "
+          "được quét. Chúng tôi sử dụng bộ phát hiện được huấn luyện trên PubLayNet để trích xuất các khối văn bản. ",
+}
+
+
+def legacy_column_width_ja(text: str) -> int:
+    """Ancienne largeur japonaise."""
+    combining_correction = sum([-1 for c in text if unicodedata.combining(c)])
+    try:
+        width = sum([2 if unicodedata.east_asian_width(c) in ("W", "F") else 1 for c in text])
+    except AttributeError:
+        width = len(text)
+    return width + combining_correction
+
+
+def legacy_column_width_vi(text: str) -> int:
+    """Ancienne largeur vietnamienne."""
+    combining_correction = sum([-1 for c in text if unicodedata.combining(c)])
+    return len(text) + combining_correction
+
+
+class LegacyWidths(WidthTable):
+    """Largeurs recalculées à chaque appel, comme dans les anciens modules."""
+
+    def __init__(self, column_width):
+        super().__init__(column_width)
+        self.column_width = column_width
+        self.char_width = column_width
+
+
+class LegacyWrapper(ColumnWrapper):
+    def _break_word(self, word, space_left):
+        total = 0
+        for i, c in enumerate(word):
+            total += self.widths.column_width(c)
+            if total > space_left:
+                return word[: i - 1], word[i - 1:]
+        return word, ""
+
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--length", type=int, default=20, help="Copies de l'échantillon par texte")
+    args = parser.parse_args()
+
+    # Construction des tables hors mesure
+    JAPANESE_WIDTHS.table
+    LATIN_WIDTHS.table
+
+    cases = (
+        ("ja", legacy_column_width_ja, JAPANESE_WIDTHS, fw_fill_ja),
+        ("vi", legacy_column_width_vi, LATIN_WIDTHS, fw_fill_vi),
+    )
+    for language, legacy_width, widths, fill in cases:
+        text = SAMPLES[language] * args.length
+        legacy_wrapper = LegacyWrapper(LegacyWidths(legacy_width))
+
+        old, old_seconds = timed(lambda: legacy_width(text), args.repeat)
+        new, new_seconds = timed(lambda: widths.column_width(text), args.repeat)
+        assert old == new, f"{language}: column_width {old} != {new}"
+        print(f"{language} column_width {len(text):6} chars: legacy {old_seconds * 1000:8.2f} ms, "
+              f"table {new_seconds * 1000:6.2f} ms ({old_seconds / new_seconds:.1f}x)")
+
+        # Mots courts, comme les mesure le wrapper
+        words = text.split()
+        old, old_seconds = timed(lambda: [legacy_width(word) for word in words], args.repeat)
+        new, new_seconds = timed(lambda: [widths.column_width(word) for word in words], args.repeat)
+        assert old == new, f"{language}: column_width differs on words"
+        print(f"{language} column_width {len(words):6} words: legacy {old_seconds * 1000:8.2f} ms, "
+              f"table {new_seconds * 1000:6.2f} ms ({old_seconds / new_seconds:.1f}x)")
+
+        for width in (8, 20, 40):
+            legacy_wrapper.width = width
+            old, old_seconds = timed(lambda: "\n".join(legacy_wrapper.wrap(text)), args.repeat)
+            new, new_seconds = timed(lambda: fill(text, width=width), args.repeat)
+            assert old == new, f"{language}: fill differs at width {width}"
+            print(f"{language} fill width {width:3}: legacy {old_seconds * 1000:8.2f} ms, "
+                  f"table {new_seconds * 1000:6.2f} ms ({old_seconds / new_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
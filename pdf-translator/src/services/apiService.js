@@ -40,24 +40,37 @@ apiClient.interceptors.request.use(async config => {
     return Promise.reject(error);
 });
 
+// Délai avant nouvelle tentative: Retry-After du serveur s'il est fourni
+const retryDelay = (error, attempt) => {
+    const retryAfter = Number(error.response?.headers?.['retry-after']);
+    return Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter * 1000 : RETRY_DELAY * attempt;
+};
+
 // Intercepteur de réponse avec retry
 apiClient.interceptors.response.use(
     response => response,
     async error => {
         const originalRequest = error.config;
 
-        if (!originalRequest || !originalRequest._retry) {
-            originalRequest._retry = 0;
+        if (!originalRequest) {
+            return Promise.reject(error);
         }
+        originalRequest._retry = originalRequest._retry || 0;
+
+        // Réessayer seulement quand le serveur n'a pas traité la requête:
+        // surcharge (429/503) ou erreur réseau sur une lecture. Une erreur 500
+        // ne doit pas relancer une traduction.
+        const status = error.response?.status;
+        const retryable = status === 429 || status === 503 ||
+            (error.code === 'ERR_NETWORK' && originalRequest.method === 'get');
 
-        if (originalRequest._retry < MAX_RETRIES &&
-            (error.code === 'ERR_NETWORK' || error.response?.status === 500)) {
+        if (originalRequest._retry < MAX_RETRIES && retryable) {
 
             originalRequest._retry++;
 
             console.log(`Tentative de reconnexion ${originalRequest._retry}/${MAX_RETRIES}`);
 
-            await delay(RETRY_DELAY * originalRequest._retry);
+            await delay(retryDelay(error, originalRequest._retry));
 
             return apiClient(originalRequest);
         }
@@ -1,7 +1,36 @@
 import apiClient from './apiService';
 
 export const translationService = {
-  async translatePdfPage(pdfFile, pageNumber, sourceLanguage, targetLanguage) {
+  // Suit l'avancement d'une tâche via le flux server-sent events du serveur
+  waitForJob(jobId, onProgress) {
+    return new Promise((resolve, reject) => {
+      const events = new EventSource(`${apiClient.defaults.baseURL}/jobs/${jobId}/events`);
+
+      const handleUpdate = event => {
+        const job = JSON.parse(event.data);
+        if (typeof onProgress === 'function') {
+          onProgress(job);
+        }
+        if (job.status === 'done') {
+          events.close();
+          apiClient.get(`/jobs/${jobId}/result`).then(({ data }) => resolve(data), reject);
+        } else if (job.status === 'failed') {
+          events.close();
+          reject(new Error(job.error || 'Erreur du serveur de traduction'));
+        }
+      };
+
+      ['queued', 'running', 'done', 'failed'].forEach(type => events.addEventListener(type, handleUpdate));
+      // EventSource se reconnecte seul; on n'abandonne que si le flux est fermé
+      events.onerror = () => {
+        if (events.readyState === EventSource.CLOSED) {
+          reject(new Error('Connexion au suivi de la traduction perdue'));
+        }
+      };
+    });
+  },
+
+  async translatePdfPage(pdfFile, pageNumber, sourceLanguage, targetLanguage, onProgress) {
     try {
       if (!pdfFile) {
         throw new Error('Fichier PDF requis');
@@ -30,7 +59,8 @@ export const translationService = {
         timeout: 60000,
       });
 
-      return response.data;
+      // Le serveur répond immédiatement avec l'identifiant de la tâche
+      return await this.waitForJob(response.data.job_id, onProgress);
 
     } catch (error) {
       console.error('Erreur de traduction:', error);